@@ -1,11 +1,70 @@
-from fastapi import APIRouter, Query
-from app.services.storage import read_delta_head
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from app.services.storage import (
+    ARROW_STREAM_MEDIA_TYPE, Cursor, batches_to_ipc, batches_to_rows, open_dataset, read_page, scan_pages, table_uri, to_json,
+)
 from app.services.settings import settings
 from app.services import app_config
+from app.services.cache import caches
+from app.services.concurrency import flight
+from app.services.delta_tables import registry
 
 router = APIRouter(prefix="/api/data", tags=["data"])
 
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 5000
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _read_page(path: str, cursor: Cursor | None, limit: int, media_type: str):
+    batches, next_cursor = read_page(path, cursor, limit=limit)
+    token = next_cursor.encode() if next_cursor else None
+    if media_type == ARROW_STREAM_MEDIA_TYPE:
+        schema = batches[0].schema if batches else open_dataset(path)[0].schema
+        return batches_to_ipc(batches, schema), token
+    return to_json({"path": path, "rows": batches_to_rows(batches), "next_cursor": token}), token
+
+
+def _ndjson(path: str, cursor: Cursor | None, limit: int | None):
+    # One JSON object per row, written batch by batch. When the stream stops because of
+    # ``limit`` the last line is {"next_cursor": ...} so the client can resume.
+    rows, after = 0, None
+    for batch, after in scan_pages(path, cursor, limit=limit):
+        rows += batch.num_rows
+        yield b"".join(to_json(row) + b"\n" for row in batch.to_pylist())
+    if limit is not None and rows >= limit and after is not None:
+        yield to_json({"next_cursor": after.encode()}) + b"\n"
+
 
 @router.get("/deg_analysis")
-def get_delta(path: str = Query(default=app_config.DATA_PATHS.get("adeg")), limit: int = 20):
-    return {"path": path, "rows": read_delta_head(path, limit=limit)}
+async def get_delta(
+    request: Request,
+    path: str = Query(default=app_config.DATA_PATHS.get("adeg")),
+    limit: int | None = Query(default=None, ge=1),
+    cursor: str | None = None,
+    format: Literal["json", "ndjson"] = "json",
+):
+    try:
+        position = Cursor.decode(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if format == "ndjson":
+        return StreamingResponse(_ndjson(path, position, limit), media_type=NDJSON_MEDIA_TYPE)
+
+    limit = min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    media_type = ARROW_STREAM_MEDIA_TYPE if ARROW_STREAM_MEDIA_TYPE in request.headers.get("accept", "") else "application/json"
+    version = position.version if position else registry.version(table_uri(path))
+    key = ("page", path, version, cursor, limit, media_type)
+    # A page of a given table version never changes, so rendered bodies are cached;
+    # without a known version (table not opened yet) the key would be ambiguous.
+    cached = caches["tables"].get(key) if version is not None else None
+    if cached is None:
+        cached = await flight.do(key, _read_page, path, position, limit, media_type)
+        if version is not None:
+            caches["tables"].set(key, cached)
+    body, token = cached
+    headers = {"X-Next-Cursor": token} if token else {}
+    return Response(content=body, media_type=media_type, headers=headers)
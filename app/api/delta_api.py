@@ -1,21 +1,19 @@
 # app/api/delta_api.py
-from fastapi import APIRouter
-from deltalake import DeltaTable
-import pandas as pd
-import os
-from app.services import settings
-from app.services import app_config
-from dotenv import load_dotenv
-
 import json
-import os
 from typing import Any, List
-import fsspec
-from azure.identity import DefaultAzureCredential
-from deltalake import DeltaTable
-import pandas as pd
-from app.services.settings import settings
+
+from dotenv import load_dotenv
+from fastapi import APIRouter, HTTPException, Query, Response
+
 from app.services import app_config
+from app.services.delta_tables import registry
+from app.services.storage import replica_syncer, table_uri
+from app.services.storage_clients import clients
+from app.services.latest_index import LatestRunIndex
+from app.services.concurrency import flight, run_blocking
+from app.services.json_cache import CachedJson, encode, json_cache
+from app.services import cache
+from app.services.wsgi_pool import dash_pool
 
 
 
@@ -25,55 +23,100 @@ load_dotenv(".env", override=False)  # override=False means host vars take prior
 
 router = APIRouter()
 
-_account = app_config.BASE_PATHS.get("storage_account") 
-_container = app_config.BASE_PATHS.get("silver_container") 
-token = settings.BIOMRKTOOLS_SA_TOKEN
+# Resolved through storage.table_uri on every refresh so the local replica is used once it is ready.
+DELTA_PATH = app_config.DATA_PATHS["adeg_runs"]
+
+DEFAULT_ANALYSIS_ID = "adeg_brca_001"
+
+latest_index = LatestRunIndex(lambda: table_uri(DELTA_PATH), storage_options=clients.delta_storage_options)
+
+
+def read_latest(analysis_id: str, columns: List[str]) -> dict:
+    latest = latest_index.read(analysis_id, columns=columns)
+    if latest is None:
+        raise HTTPException(status_code=404, detail=f"No runs found for analysis_id '{analysis_id}'")
+    return latest
+
+
+def _load_json_column(analysis_id: str, column: str) -> Any:
+    return json.loads(read_latest(analysis_id, [column])[column])
+
+
+async def read_json_column(analysis_id: str, column: str, field: str | None = None, default: Any = None) -> CachedJson:
+    """Parsed (and pre-encoded) ``column`` of the latest run, optionally narrowed to one key."""
+    version = await run_blocking(latest_index.refresh)
+    key = (DELTA_PATH, version, analysis_id, column, field)
+    cached = json_cache.get(key)
+    if cached is not None:
+        return cached
+
+    parsed = json_cache.get(key[:-1] + (None,))
+    if parsed is None:
+        # Concurrent requests for the same analysis/column/version share one read.
+        value = await flight.do(("json",) + key[:-1], _load_json_column, analysis_id, column)
+        parsed = CachedJson(value, encode(value))
+        json_cache.set(key[:-1] + (None,), parsed)
+    if field is None:
+        return parsed
+
+    value = parsed.value.get(field, default)
+    cached = CachedJson(value, encode(value))
+    json_cache.set(key, cached)
+    return cached
+
+
+def _json_response(cached: CachedJson) -> Response:
+    return Response(content=cached.body, media_type="application/json")
+
+
+@router.get("/table_cache")
+def get_table_cache_stats():
+    return registry.stats()
+
+
+@router.get("/storage")
+def get_storage_stats():
+    return clients.stats()
+
+
+@router.get("/replica")
+def get_replica_stats():
+    return replica_syncer.stats()
+
 
-DELTA_PATH = f"abfss://{_container}@{_account}.dfs.core.windows.net/biomrk_master/adeg/analysis/log_adeg_summary"
+@router.get("/single_flight")
+def get_single_flight_stats():
+    return flight.stats()
 
 
-print(DELTA_PATH)
+@router.get("/json_cache")
+def get_json_cache_stats():
+    return json_cache.stats()
 
-def read_delta():
-    
-    dt = DeltaTable(
-        table_uri=DELTA_PATH,
-        storage_options={
-            "azure_storage_account_name": _account,
-            "azure_storage_sas_token": token
-        }
-    )
 
-    pd = dt.to_pandas()
+@router.get("/cache")
+def get_cache_stats():
+    return cache.stats()
 
 
-    print(pd)
+@router.get("/dash_pool")
+def get_dash_pool_stats():
+    return dash_pool.stats()
 
-    return pd
 
 @router.get("/config")
-def get_config():
-    df = read_delta()
-    latest = df[df.analysis_id=="adeg_brca_001"].sort_values("timestamp", ascending=False).iloc[0]
-    config = latest["config"]
-    import json
-    return json.loads(config)
+async def get_config(analysis_id: str = Query(default=DEFAULT_ANALYSIS_ID)):
+    return _json_response(await read_json_column(analysis_id, "config"))
 
 
 @router.get("/dir_summary")
-def get_dir_summary():
-    df = read_delta()
-    latest = df[df.analysis_id=="adeg_brca_001"].sort_values("timestamp", ascending=False).iloc[0]
-    dir_summary = latest["dir_summary"]
-    import json
-    return json.loads(dir_summary)
+async def get_dir_summary(analysis_id: str = Query(default=DEFAULT_ANALYSIS_ID)):
+    return _json_response(await read_json_column(analysis_id, "dir_summary"))
 
 @router.get("/top_genes")
-def get_top_genes():
-    dir_summary = get_dir_summary()
-    return dir_summary.get("top_genes", [])
+async def get_top_genes(analysis_id: str = Query(default=DEFAULT_ANALYSIS_ID)):
+    return _json_response(await read_json_column(analysis_id, "dir_summary", "top_genes", []))
 
 @router.get("/summary")
-def get_summary():
-    dir_summary = get_dir_summary()
-    return dir_summary.get("summary", {})
+async def get_summary(analysis_id: str = Query(default=DEFAULT_ANALYSIS_ID)):
+    return _json_response(await read_json_column(analysis_id, "dir_summary", "summary", {}))
@@ -0,0 +1,42 @@
+# app/api/query.py
+from datetime import datetime
+from typing import List
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.services import app_config
+from app.services.concurrency import run_blocking
+from app.services.query import query_table
+
+router = APIRouter(prefix="/api/query", tags=["query"])
+
+MAX_QUERY_ROWS = 5000
+
+
+@router.get("/{table}")
+async def query(
+    table: str,
+    cancer_code: List[str] = Query(default=[]),
+    analysis_id: List[str] = Query(default=[]),
+    start: datetime | None = None,
+    end: datetime | None = None,
+    time_column: str = "timestamp",
+    columns: List[str] = Query(default=[]),
+    limit: int = Query(default=100, ge=1, le=MAX_QUERY_ROWS),
+):
+    path = app_config.DATA_PATHS.get(table)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Unknown table '{table}'. Available: {sorted(app_config.DATA_PATHS)}")
+
+    equals = {"cancer_code": cancer_code, "analysis_id": analysis_id}
+    try:
+        result = await run_blocking(query_table, path, equals, time_column, start, end, columns or None, limit)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=f"Unknown column: {e.args[0]}")
+
+    return {
+        "table": table,
+        "version": result.version,
+        "rows": result.rows,
+        "metrics": result.metrics.as_dict(),
+    }
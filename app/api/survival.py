@@ -0,0 +1,46 @@
+# app/api/survival.py
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.services.cohorts import cohorts
+from app.services.concurrency import flight
+from app.services.survival_scan import survival_scan
+
+router = APIRouter(prefix="/api/survival", tags=["survival"])
+
+MAX_SCAN_ROWS = 20000
+
+
+def _scan(cohort_name: str, method: str):
+    return survival_scan(cohorts.get(cohort_name), method)
+
+
+@router.get("/cohorts")
+def list_cohorts():
+    return {"cohorts": cohorts.names()}
+
+
+@router.get("/scan/{cohort}")
+async def scan(
+    cohort: str,
+    method: Literal["median", "optimal"] = "median",
+    limit: int = Query(default=100, ge=1, le=MAX_SCAN_ROWS),
+    max_q: float | None = Query(default=None, gt=0, le=1),
+):
+    if cohort not in cohorts.names():
+        raise HTTPException(status_code=404, detail=f"Unknown cohort '{cohort}'. Available: {cohorts.names()}")
+
+    # Concurrent requests for the same scan share one run; the result is cached per cohort.
+    result = await flight.do(("survival-scan", cohort, method), _scan, cohort, method)
+    genes_tested = int(result["p_value"].notna().sum())
+    if max_q is not None:
+        result = result[result["q_value"] <= max_q]
+    page = result.head(limit)
+    page = page.astype(object).where(page.notna(), None)
+    return {
+        "cohort": cohort,
+        "method": method,
+        "genes_tested": genes_tested,
+        "rows": page.to_dict("records"),
+    }
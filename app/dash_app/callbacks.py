@@ -1,38 +1,48 @@
-from dash import Output, Input, html, callback
-from .callbacks_settings import background_callback_manager
-from .controllers import load_latest_analysis
-from ..services.storage import read_delta_head
+from dash_extensions.enrich import Output, Input, Serverside, callback, clientside_callback
+from ..services.analysis_cache import entry_key, load_latest_entry
+from ..services.settings import settings
+from ..services.storage import DEFAULT_PARTITIONS, _table_path
 
 
 @callback(
     Output("analysis-store", "data"),
+    Output("analysis-display", "data"),
     Input("url", "pathname"),
-    background=True,
-    manager=background_callback_manager
 )
 def load_analysis(_):
-    variables = read_delta_head()
-    return variables  # must be JSON-serializable
+    # Served from the shared stale-while-revalidate cache; only a cold or expired
+    # entry reads the Delta table.
+    entry = load_latest_entry()
+    variables = entry["value"]
+    # The panels are rendered in the browser from this small, JSON-safe subset.
+    display = {"config": variables.get("config"), "dir_summary": variables.get("dir_summary")}
+    if settings.DASH_SERVERSIDE_STORE:
+        # Same table version + filters -> same key, so sessions share one stored value.
+        return Serverside(variables, key=entry_key(_table_path, DEFAULT_PARTITIONS, entry["version"])), display
+    return variables, display  # must be JSON-serializable
 
-@callback(
+
+# Pure formatting runs clientside: no request goes back through WSGIMiddleware.
+clientside_callback(
+    """
+    function(display) {
+        if (!display) { return "Loading..."; }
+        const value = display.config;
+        return typeof value === "string" ? value : JSON.stringify(value);
+    }
+    """,
     Output("config-panel", "children"),
-    Input("analysis-store", "data")
+    Input("analysis-display", "data"),
 )
-def display_config(variables):
-    if not variables:
-        return html.Div("Loading...")
-    return [
-        #html.Div(f"{k}: {', '.join(map(str, v)) if isinstance(v, list) else v}")
-        #for k, v in variables["config"]#.items()
-        html.Div( variables["config"])
-    ]
 
-@callback(
+clientside_callback(
+    """
+    function(display) {
+        if (!display) { return "Loading..."; }
+        const value = display.dir_summary;
+        return typeof value === "string" ? value : JSON.stringify(value);
+    }
+    """,
     Output("summary-panel", "children"),
-    Input("analysis-store", "data")
+    Input("analysis-display", "data"),
 )
-def display_summary(variables):
-    if not variables:
-        return html.Div("Loading...")
-    summary = variables["dir_summary"]#["summary"]
-    return html.Div(summary)
\ No newline at end of file
@@ -1,5 +1,24 @@
-import diskcache
+import os
+
 from dash import DiskcacheManager
+from dash_extensions.enrich import FileSystemBackend, ServersideOutputTransform
+
+from ..services.cache import disk
+from ..services.settings import settings
 
-cache = diskcache.Cache("./cache")
+# Background callbacks share the app-wide disk cache (same directory, size limit and eviction).
+cache = disk
 background_callback_manager = DiskcacheManager(cache)
+
+# Server-side store: the browser only holds a key, values stay in a bounded on-disk cache.
+serverside_backend = FileSystemBackend(
+    cache_dir=os.path.join(settings.CACHE_DIR, "serverside"),
+    threshold=settings.SERVERSIDE_STORE_MAX_ENTRIES,
+    default_timeout=settings.SERVERSIDE_STORE_TTL_SECONDS,
+)
+
+
+def dash_transforms() -> list:
+    if not settings.DASH_SERVERSIDE_STORE:
+        return []
+    return [ServersideOutputTransform(backends=[serverside_backend])]
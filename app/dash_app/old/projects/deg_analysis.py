@@ -1,9 +1,17 @@
 import dash
 import dash_bootstrap_components as dbc
-from dash import html, dcc, dash_table, Input, Output, callback
+from dash import html, dcc, dash_table, Input, Output, callback, ctx, no_update
 import plotly.express as px
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+
+from app.services.deg_data import df_deg
+from app.services.figure_cache import cached_figures
+from app.services.hashing import fingerprint
+from app.services.table_query import ArrowTableQuery
+from app.services.heatmap import HeatmapTiler, heatmap_figure, is_zoom_event, parse_relayout
+from app.services.volcano import volcano_figure
 
 
 # 30 named genes
@@ -16,40 +24,6 @@ genes = [
     "MTOR", "MAPK1", "FGFR1", "JUN", "STAT3"
 ]
 
-df_deg = pd.DataFrame([
-    ("MMP9", 3.2, 0.0000012, 0.0000012, True),
-    ("COL1A1", 2.9, 0.00015, 0.0002, True),
-    ("CDH1", -2.3, 0.0008, 0.001, True),
-    ("TP53INP1", -1.8, 0.002, 0.0025, True),
-    ("ACTB", 0.4, 0.3, 0.35, False),
-    ("BRCA1", 2.5, 0.00005, 0.00006, True),
-    ("EGFR", -1.7, 0.01, 0.015, True),
-    ("MYC", 3.0, 0.0001, 0.00012, True),
-    ("VEGFA", 1.5, 0.04, 0.045, True),
-    ("KRAS", -0.6, 0.5, 0.6, False),
-    ("BCL2", -2.1, 0.005, 0.006, True),
-    ("PTEN", 2.0, 0.0003, 0.00035, True),
-    ("AKT1", 1.8, 0.02, 0.025, True),
-    ("TP53", -3.1, 0.00002, 0.000025, True),
-    ("GATA3", -0.3, 0.3, 0.35, False),
-    ("FOXA1", 1.2, 0.06, 0.07, False),
-    ("ERBB2", 2.7, 0.0002, 0.00025, True),
-    ("CCND1", 1.0, 0.03, 0.035, True),
-    ("CDK4", -1.5, 0.008, 0.01, True),
-    ("SMAD4", 0.7, 0.09, 0.1, False),
-    ("PIK3CA", 2.6, 0.0001, 0.00012, True),
-    ("RB1", -1.9, 0.006, 0.007, True),
-    ("CTNNB1", -0.4, 0.25, 0.3, False),
-    ("NRAS", 1.4, 0.04, 0.045, True),
-    ("NOTCH1", -2.2, 0.003, 0.0035, True),
-    ("MTOR", 2.1, 0.0005, 0.0006, True),
-    ("MAPK1", -0.2, 0.15, 0.2, False),
-    ("FGFR1", 1.6, 0.035, 0.04, True),
-    ("JUN", -2.5, 0.002, 0.0022, True),
-    ("STAT3", 0.5, 0.2, 0.25, False)
-], columns=["Gene", "log2FC", "p-value", "adj. p-value", "Significant"])
-
-
 df_heatmap = pd.DataFrame([
     [2.1, 2.3, 2.0, 2.2, 2.4],
     [1.5, 1.7, 1.4, 1.6, 1.9],
@@ -83,6 +57,20 @@ df_heatmap = pd.DataFrame([
     [0.4, 0.3, 0.5, 0.6, 0.7]
 ], index=df_deg["Gene"], columns=[f"S{i+1}" for i in range(5)])
 
+# Computed once instead of on every volcano render.
+neg_log10_adj_p = -np.log10(df_deg["adj. p-value"])
+
+DEG_FINGERPRINT = fingerprint(df_deg)
+HEATMAP_FINGERPRINT = fingerprint(df_heatmap)
+HEATMAP_TITLE = "Heatmap of Selected DEGs"
+DEG_PAGE_SIZE = 5
+
+# The table is paged, sorted and filtered server-side; only the visible page is sent.
+deg_query = ArrowTableQuery(pa.Table.from_pandas(df_deg, preserve_index=False))
+
+# Matrices beyond the render budget are served as an overview plus zoom tiles.
+heatmap_tiler = HeatmapTiler(df_heatmap)
+
 
 layout = html.Div([
     dbc.NavbarSimple(brand="BiomkTools · DEG Explorer", color="primary", dark=True),
@@ -96,11 +84,18 @@ layout = html.Div([
         dbc.Row([
             dbc.Col(dash_table.DataTable(
                 id="deg-table",
-                columns=[{"name": i, "id": i} for i in df_deg.columns],
-                data=df_deg.to_dict("records"),
-                sort_action="native",
-                filter_action="native",
-                page_size=5,
+                columns=[
+                    {"name": i, "id": i, "type": "numeric" if pd.api.types.is_numeric_dtype(t) and t != bool else "text"}
+                    for i, t in df_deg.dtypes.items()
+                ],
+                page_current=0,
+                page_size=DEG_PAGE_SIZE,
+                page_action="custom",
+                sort_action="custom",
+                sort_mode="multi",
+                sort_by=[],
+                filter_action="custom",
+                filter_query="",
                 style_table={'overflowX': 'auto'},
                 style_cell={'padding': '5px', 'textAlign': 'left'},
                 style_header={'backgroundColor': '#222', 'color': 'white', 'fontWeight': 'bold'},
@@ -115,30 +110,35 @@ layout = html.Div([
 })
 
 @callback(
-    Output("volcano-plot", "figure"),
-    Input("deg-table", "data")
+    Output("deg-table", "data"),
+    Output("deg-table", "page_count"),
+    Input("deg-table", "page_current"),
+    Input("deg-table", "page_size"),
+    Input("deg-table", "sort_by"),
+    Input("deg-table", "filter_query"),
 )
-def update_volcano(_):
-    fig = px.scatter(
-        df_deg, x="log2FC", y=-np.log10(df_deg["adj. p-value"]),
-        color="Significant",
-        hover_data=["Gene"],
-        title="Volcano Plot",
-        color_discrete_map={True: "crimson", False: "gray"},
-    )
-    fig.update_layout(template="plotly_dark", height=400)
-    return fig
+def update_deg_table(page_current, page_size, sort_by, filter_query):
+    return deg_query.page(page_current, page_size, filter_query, sort_by)
 
 @callback(
-    Output("heatmap", "figure"),
-    Input("deg-table", "data")
+    Output("volcano-plot", "figure"),
+    Input("deg-table", "id")
 )
-def update_heatmap(_):
+@cached_figures("deg.volcano", DEG_FINGERPRINT)
+def update_volcano(_):
+    # SVG for small tables; WebGL + decimated non-significant cloud for genome-scale ones.
+    return volcano_figure(df_deg, "log2FC", neg_log10_adj_p)
+
+@cached_figures("deg.heatmap", HEATMAP_FINGERPRINT)
+def heatmap_overview():
+    if not heatmap_tiler.fits:
+        return heatmap_figure(heatmap_tiler, heatmap_tiler.overview(), HEATMAP_TITLE)
+
     fig = px.imshow(
         df_heatmap,
         labels=dict(x="Sample", y="Gene", color="Expression (Z-score)"),
         color_continuous_scale="RdBu_r",
-        title="Heatmap of Selected DEGs"
+        title=HEATMAP_TITLE
     )
     fig.update_layout(
         template="plotly_dark",
@@ -157,4 +157,21 @@ def update_heatmap(_):
         yaxis=dict(domain=[0.05, 0.95]),  # stretch Y plot area
     )
     fig.update_xaxes(tickangle=0)  # horizontal sample labels for readability
-    return fig
\ No newline at end of file
+    return fig
+
+
+@callback(
+    Output("heatmap", "figure"),
+    Input("deg-table", "id"),
+    Input("heatmap", "relayoutData"),
+)
+def update_heatmap(_, relayout):
+    if ctx.triggered_id != "heatmap":
+        return heatmap_overview()
+    # Zoom events only matter when the matrix is tiled; autosize/dragmode changes never do.
+    if heatmap_tiler.fits or not is_zoom_event(relayout):
+        return no_update
+    y_range, x_range = parse_relayout(relayout)
+    if y_range is None and x_range is None:
+        return heatmap_overview()
+    return heatmap_figure(heatmap_tiler, heatmap_tiler.view(y_range, x_range), HEATMAP_TITLE)
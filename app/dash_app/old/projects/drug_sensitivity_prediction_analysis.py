@@ -1,4 +1,4 @@
-from dash import html, dcc, Input, Output, callback, State
+from dash import html, dcc, Input, Output, callback, clientside_callback, State
 import pandas as pd
 import numpy as np
 import plotly.express as px
@@ -7,6 +7,9 @@ import json
 import io
 import base64
 
+from app.services.figure_cache import cached_figures
+from app.services.hashing import fingerprint
+
 
 # Simulate drug sensitivity data
 np.random.seed(42)
@@ -24,6 +27,12 @@ df = pd.DataFrame({
 
 # 🧠 Fix incorrect lambda-as-column error
 df["DrugClass"] = df["Drug"].apply(lambda d: " ".join(d.split()[:2]))
+DRUG_FINGERPRINT = fingerprint(df)
+
+explanation_heatmap = (
+    "This heatmap shows IC50 values per sample and drug. Darker cells indicate greater resistance (higher IC50), lighter cells indicate sensitivity. "
+    "Patterns in the heatmap may highlight subgroups of samples that are particularly sensitive or resistant to specific drugs."
+)
 
 
 # Layout
@@ -56,7 +65,7 @@ layout = html.Div([
     html.Div(id="sensitivity-boxplot-text", style={"marginBottom": "30px"}),
 
     dcc.Graph(id="sensitivity-heatmap"),
-    html.Div(id="sensitivity-heatmap-text", style={"marginBottom": "30px"}),
+    html.Div(explanation_heatmap, id="sensitivity-heatmap-text", style={"marginBottom": "30px"}),
 
     html.Div([
         html.Button("Download CSV", id="btn-csv", n_clicks=0, style={"marginRight": "15px"}),
@@ -69,12 +78,11 @@ layout = html.Div([
 # Callback for filtering and visualization
 @callback(
     Output("sensitivity-boxplot", "figure"),
-    Output("sensitivity-boxplot-text", "children"),
     Output("sensitivity-heatmap", "figure"),
-    Output("sensitivity-heatmap-text", "children"),
     Input("cancer-type-dropdown", "value"),
     Input("drug-class-dropdown", "value")
 )
+@cached_figures("drug.figures", DRUG_FINGERPRINT)
 def update_figures(selected_cancer, selected_class):
     filtered = df[(df["CancerType"] == selected_cancer) & (df["DrugClass"] == selected_class)]
 
@@ -85,11 +93,6 @@ def update_figures(selected_cancer, selected_class):
     )
     fig_box.update_layout(template="plotly_dark", height=500)
 
-    explanation_box = (
-        f"This box plot displays IC50 distributions for drugs in the class '{selected_class}' across samples from '{selected_cancer}' cancer. "
-        "Drugs with lower median IC50s (lower boxes) are more potent. Outliers indicate response variability, which can guide drug prioritization or biomarker exploration."
-    )
-
     heatmap_df = filtered.pivot_table(index="Sample", columns="Drug", values="IC50")
     fig_heatmap = px.imshow(
         heatmap_df,
@@ -100,12 +103,19 @@ def update_figures(selected_cancer, selected_class):
     )
     fig_heatmap.update_layout(template="plotly_dark", height=600)
 
-    explanation_heatmap = (
-        "This heatmap shows IC50 values per sample and drug. Darker cells indicate greater resistance (higher IC50), lighter cells indicate sensitivity. "
-        "Patterns in the heatmap may highlight subgroups of samples that are particularly sensitive or resistant to specific drugs."
-    )
+    return fig_box, fig_heatmap
 
-    return fig_box, explanation_box, fig_heatmap, explanation_heatmap
+clientside_callback(
+    """
+    function(cancer, drugClass) {
+        return `This box plot displays IC50 distributions for drugs in the class '${drugClass}' across samples from '${cancer}' cancer. ` +
+            "Drugs with lower median IC50s (lower boxes) are more potent. Outliers indicate response variability, which can guide drug prioritization or biomarker exploration.";
+    }
+    """,
+    Output("sensitivity-boxplot-text", "children"),
+    Input("cancer-type-dropdown", "value"),
+    Input("drug-class-dropdown", "value"),
+)
 
 # Callbacks for download buttons
 @callback(
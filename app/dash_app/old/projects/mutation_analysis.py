@@ -1,10 +1,15 @@
 # pages/mutation_analysis.py
 
-from dash import html, dcc, Input, Output, callback
+from dash import html, dcc, dash_table, Input, Output, callback, clientside_callback
 import pandas as pd
 import numpy as np
 import plotly.express as px
 
+from app.services.figure_cache import cached_figures
+from app.services.hashing import fingerprint
+from app.services.mutations import MutationStore
+from app.services.oncoprint import OncoprintEngine, oncoprint_figure
+
 # Simulated binary mutation data (1 = mutated, 0 = wild-type)
 genes = ["TP53", "KRAS", "PIK3CA", "EGFR", "PTEN", "BRAF", "IDH1", "CDKN2A"]
 samples = [f"Sample{i}" for i in range(1, 21)]
@@ -14,52 +19,126 @@ mutation_matrix = pd.DataFrame(
     np.random.binomial(1, 0.2, size=(len(genes), len(samples))),
     index=genes, columns=samples
 )
+mutation_store = MutationStore(mutation_matrix)
+mutation_counts = mutation_store.frequency().sort_values(ascending=True)
+oncoprint_engine = OncoprintEngine(mutation_store)
+MUTATION_FINGERPRINT = fingerprint(mutation_matrix)
+TOP_PAIRS = 10
+
+PAIR_TABLE_COLUMNS = [
+    {"name": "Gene A", "id": "gene_a"},
+    {"name": "Gene B", "id": "gene_b"},
+    {"name": "Both", "id": "both", "type": "numeric"},
+    {"name": "Only A", "id": "only_a", "type": "numeric"},
+    {"name": "Only B", "id": "only_b", "type": "numeric"},
+    {"name": "log2 OR", "id": "log2_odds_ratio", "type": "numeric", "format": {"specifier": ".2f"}},
+    {"name": "p-value", "id": "p_value", "type": "numeric", "format": {"specifier": ".3g"}},
+]
+
+
+def pair_table(table_id):
+    return dash_table.DataTable(
+        id=table_id,
+        columns=PAIR_TABLE_COLUMNS,
+        style_table={"overflowX": "auto"},
+        style_cell={"padding": "5px", "textAlign": "left"},
+        style_header={"backgroundColor": "#222", "color": "white", "fontWeight": "bold"},
+        style_data={"backgroundColor": "#333", "color": "white"},
+    )
+
+
+# Explanations depend only on module-level data, so they are part of the layout
+# instead of callback outputs.
+explanation_heatmap = (
+    "This oncoprint shows mutation status for the selected genes, most frequently mutated first. "
+    "Red blocks mark mutated genes. Samples are sorted by their mutation pattern across the genes "
+    "(memo-sort), which groups co-altered samples and makes mutually exclusive genes appear as "
+    "staircases. When there are more samples than the plot has room for, adjacent samples are "
+    "merged and the color shows the fraction mutated."
+)
+explanation_bar = (
+    "The bar chart ranks genes by mutation frequency. "
+    f"{mutation_counts.idxmax()} is mutated in the highest number of samples "
+    f"({mutation_counts.max()}), potentially indicating oncogenic significance. "
+    "Genes with fewer mutations may still have clinical relevance if they're actionable."
+)
+explanation_co = (
+    "This matrix counts how often gene pairs are mutated together. "
+    "High values suggest synergistic or co-occurring mutations, possibly in shared pathways. "
+    "Diagonal is zeroed out since it represents self-comparisons."
+)
+explanation_pairs = (
+    "Every gene pair is tested with a one-sided Fisher's exact test: for co-occurrence "
+    "when the pair is mutated together more often than expected (odds ratio > 1), for "
+    "mutual exclusivity when less often (odds ratio < 1). p-values are not corrected "
+    "for the number of pairs tested."
+)
 
 # Layout
 layout = html.Div([
     html.H3("Gene Alteration / Mutation Analysis"),
 
     html.H5("Mutation Matrix"),
+    dcc.Dropdown(
+        id="oncoprint-genes",
+        options=[{"label": g, "value": g} for g in mutation_store.genes],
+        value=oncoprint_engine.default_genes(),
+        multi=True,
+        style={"color": "black"},
+    ),
+    dcc.Store(id="oncoprint-width"),
     dcc.Graph(id="mutation-heatmap"),
-    html.Div(id="mutation-heatmap-text", style={"marginBottom": "30px"}),
+    html.Div(explanation_heatmap, id="mutation-heatmap-text", style={"marginBottom": "30px"}),
 
     html.H5("Mutation Frequency"),
     dcc.Graph(id="mutation-frequency"),
-    html.Div(id="mutation-frequency-text", style={"marginBottom": "30px"}),
+    html.Div(explanation_bar, id="mutation-frequency-text", style={"marginBottom": "30px"}),
 
     html.H5("Co-Mutation Matrix"),
     dcc.Graph(id="co-mutation-heatmap"),
-    html.Div(id="co-mutation-text"),
+    html.Div(explanation_co, id="co-mutation-text", style={"marginBottom": "30px"}),
+
+    html.H5("Top Co-occurring Pairs"),
+    pair_table("co-occurring-pairs"),
+    html.H5("Top Mutually Exclusive Pairs", style={"marginTop": "30px"}),
+    pair_table("exclusive-pairs"),
+    html.Div(explanation_pairs, id="mutation-pairs-text", style={"marginTop": "10px"}),
 ])
 
-# Unified callback
+# Width of the oncoprint in the browser, rounded so similar screens share cached figures.
+clientside_callback(
+    """
+    function(_) {
+        const graph = document.getElementById("mutation-heatmap");
+        const width = graph && graph.clientWidth ? graph.clientWidth : window.innerWidth;
+        return Math.max(100, Math.round(width / 100) * 100);
+    }
+    """,
+    Output("oncoprint-width", "data"),
+    Input("mutation-heatmap", "id")
+)
+
+
 @callback(
     Output("mutation-heatmap", "figure"),
-    Output("mutation-heatmap-text", "children"),
+    Input("oncoprint-genes", "value"),
+    Input("oncoprint-width", "data")
+)
+@cached_figures("mutation.oncoprint", MUTATION_FINGERPRINT)
+def update_oncoprint(selected, width):
+    oncoprint = oncoprint_engine.render(selected or None, width)
+    return oncoprint_figure(oncoprint, mutation_store.samples, title="Mutation Matrix")
+
+
+# Unified callback
+@callback(
     Output("mutation-frequency", "figure"),
-    Output("mutation-frequency-text", "children"),
     Output("co-mutation-heatmap", "figure"),
-    Output("co-mutation-text", "children"),
-    Input("mutation-heatmap", "id")
+    Input("mutation-frequency", "id")
 )
+@cached_figures("mutation.figures", MUTATION_FINGERPRINT)
 def update_mutation_figures(_):
-    # Heatmap
-    fig_heatmap = px.imshow(
-        mutation_matrix,
-        color_continuous_scale=["#ffffff", "#d62728"],
-        labels=dict(x="Sample", y="Gene", color="Mutated"),
-        title="Mutation Matrix (1 = mutated, 0 = wild-type)"
-    )
-    fig_heatmap.update_layout(template="plotly_dark", height=500)
-
-    explanation_heatmap = (
-        "This heatmap shows mutation status for 8 genes across 20 samples. "
-        "Red blocks mark mutated genes. Some samples exhibit clustered mutations, "
-        "suggesting possible co-altered pathways or mutational hotspots."
-    )
-
     # Frequency bar chart
-    mutation_counts = mutation_matrix.sum(axis=1).sort_values(ascending=True)
     fig_bar = px.bar(
         mutation_counts,
         orientation="h",
@@ -68,16 +147,8 @@ def update_mutation_figures(_):
     )
     fig_bar.update_layout(template="plotly_dark", height=400)
 
-    explanation_bar = (
-        "The bar chart ranks genes by mutation frequency. "
-        f"{mutation_counts.idxmax()} is mutated in the highest number of samples "
-        f"({mutation_counts.max()}), potentially indicating oncogenic significance. "
-        "Genes with fewer mutations may still have clinical relevance if they're actionable."
-    )
-
-    # Co-mutation matrix
-    co_matrix = mutation_matrix.dot(mutation_matrix.T)
-    np.fill_diagonal(co_matrix.values, 0)
+    # Co-mutation matrix (popcount over the bit-packed rows)
+    co_matrix = mutation_store.comutation_counts()
 
     fig_co = px.imshow(
         co_matrix,
@@ -88,10 +159,14 @@ def update_mutation_figures(_):
     )
     fig_co.update_layout(template="plotly_dark", height=600)
 
-    explanation_co = (
-        "This matrix counts how often gene pairs are mutated together. "
-        "High values suggest synergistic or co-occurring mutations, possibly in shared pathways. "
-        "Diagonal is zeroed out since it represents self-comparisons."
-    )
+    return fig_bar, fig_co
+
 
-    return fig_heatmap, explanation_heatmap, fig_bar, explanation_bar, fig_co, explanation_co
+@callback(
+    Output("co-occurring-pairs", "data"),
+    Output("exclusive-pairs", "data"),
+    Input("co-occurring-pairs", "id")
+)
+def update_mutation_pairs(_):
+    pairs = mutation_store.pair_tests(top_k=TOP_PAIRS)
+    return pairs.cooccurring.to_dict("records"), pairs.exclusive.to_dict("records")
@@ -1,10 +1,13 @@
-from dash import html, dcc, Input, Output, callback
+from dash import html, dcc, Input, Output, callback, clientside_callback
 import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from sklearn.decomposition import PCA
 
+from app.services.figure_cache import cached_figures
+from app.services.hashing import fingerprint
+
 # Simulate multi-omics data
 np.random.seed(42)
 genes = [f"Gene{i+1}" for i in range(30)]
@@ -27,6 +30,17 @@ df_methyl.rename(columns={"index": "Gene"}, inplace=True)
 
 # Combine
 df_omics = pd.concat([df_transcript, df_protein, df_methyl], ignore_index=True)
+OMICS_FINGERPRINT = fingerprint(df_omics)
+
+explanation_corr = (
+    "This matrix shows Pearson correlation between omics layers for the selected gene. "
+    "High correlation between transcriptomics and proteomics suggests consistent expression, while a negative correlation "
+    "between methylation and expression layers may imply epigenetic control."
+)
+explanation_pca = (
+    "This PCA plot reduces the dimensionality of the transcriptomics data across all genes. "
+    "Genes clustering together may share regulatory or functional roles, and the overall structure reflects transcriptional diversity."
+)
 
 layout = html.Div([
     html.H3("Multi-Omics Integration"),
@@ -60,24 +74,21 @@ layout = html.Div([
     html.Div(id="omics-heatmap-text", style={"marginBottom": "30px"}),
 
     dcc.Graph(id="omics-correlation"),
-    html.Div(id="omics-correlation-text", style={"marginBottom": "30px"}),
+    html.Div(explanation_corr, id="omics-correlation-text", style={"marginBottom": "30px"}),
 
     dcc.Graph(id="omics-pca"),
-    html.Div(id="omics-pca-text", style={"marginBottom": "30px"})
+    html.Div(explanation_pca, id="omics-pca-text", style={"marginBottom": "30px"})
 ])
 
 @callback(
     Output("omics-barplot", "figure"),
-    Output("omics-barplot-text", "children"),
     Output("omics-heatmap", "figure"),
-    Output("omics-heatmap-text", "children"),
     Output("omics-correlation", "figure"),
-    Output("omics-correlation-text", "children"),
     Output("omics-pca", "figure"),
-    Output("omics-pca-text", "children"),
     Input("gene-dropdown", "value"),
     Input("sample-dropdown", "value")
 )
+@cached_figures("omics.figures", OMICS_FINGERPRINT)
 def update_omics_figures(selected_gene, selected_sample):
     bar_df = df_omics[(df_omics["Gene"] == selected_gene) & (df_omics["Sample"] == selected_sample)]
 
@@ -88,12 +99,6 @@ def update_omics_figures(selected_gene, selected_sample):
     )
     fig_bar.update_layout(template="plotly_dark", height=400)
 
-    explanation_bar = (
-        f"This bar chart shows {selected_gene}'s expression level across omics layers in {selected_sample}. "
-        "Concordance between transcriptomics and proteomics may indicate strong regulation, while methylation patterns "
-        "can help infer epigenetic silencing or activation."
-    )
-
     heat_df = df_omics[df_omics["Gene"] == selected_gene].pivot(index="Omics", columns="Sample", values="Expression")
 
     fig_heat = px.imshow(
@@ -105,22 +110,11 @@ def update_omics_figures(selected_gene, selected_sample):
     )
     fig_heat.update_layout(template="plotly_dark", height=500)
 
-    explanation_heat = (
-        f"The heatmap illustrates {selected_gene}'s multi-omics expression across all samples. "
-        "High expression in transcriptomics and low in proteomics may suggest post-transcriptional repression. "
-        "Conversely, high methylation paired with low gene expression could indicate epigenetic silencing."
-    )
-
     # Correlation between omics layers
     corr_df = df_omics[df_omics["Gene"] == selected_gene].pivot(index="Sample", columns="Omics", values="Expression")
     corr_matrix = corr_df.corr()
     fig_corr = px.imshow(corr_matrix, text_auto=".2f", title="Omics Correlation Matrix")
     fig_corr.update_layout(template="plotly_dark", height=400)
-    explanation_corr = (
-        "This matrix shows Pearson correlation between omics layers for the selected gene. "
-        "High correlation between transcriptomics and proteomics suggests consistent expression, while a negative correlation "
-        "between methylation and expression layers may imply epigenetic control."
-    )
 
     # PCA plot of all genes in transcriptomics (as example)
     transcript_df = df_transcript.pivot(index="Gene", columns="Sample", values="Expression")
@@ -131,9 +125,24 @@ def update_omics_figures(selected_gene, selected_sample):
         title="PCA of Transcriptomics Data"
     )
     pca_fig.update_layout(template="plotly_dark", height=500)
-    explanation_pca = (
-        "This PCA plot reduces the dimensionality of the transcriptomics data across all genes. "
-        "Genes clustering together may share regulatory or functional roles, and the overall structure reflects transcriptional diversity."
-    )
-
-    return fig_bar, explanation_bar, fig_heat, explanation_heat, fig_corr, explanation_corr, pca_fig, explanation_pca
+    return fig_bar, fig_heat, fig_corr, pca_fig
+
+
+clientside_callback(
+    """
+    function(gene, sample) {
+        return [
+            `This bar chart shows ${gene}'s expression level across omics layers in ${sample}. ` +
+            "Concordance between transcriptomics and proteomics may indicate strong regulation, while methylation patterns " +
+            "can help infer epigenetic silencing or activation.",
+            `The heatmap illustrates ${gene}'s multi-omics expression across all samples. ` +
+            "High expression in transcriptomics and low in proteomics may suggest post-transcriptional repression. " +
+            "Conversely, high methylation paired with low gene expression could indicate epigenetic silencing."
+        ];
+    }
+    """,
+    Output("omics-barplot-text", "children"),
+    Output("omics-heatmap-text", "children"),
+    Input("gene-dropdown", "value"),
+    Input("sample-dropdown", "value"),
+)
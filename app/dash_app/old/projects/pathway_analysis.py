@@ -1,40 +1,60 @@
 # pages/pathway_analysis.py
 
-from dash import html, dcc, Input, Output, callback
+from dash import html, dcc, Input, Output, callback, clientside_callback
 import pandas as pd
 import numpy as np
 import plotly.express as px
+import plotly.graph_objects as go
+
+from app.dash_app.callbacks_settings import background_callback_manager
+from app.services.concurrency import processes
+from app.services.deg_data import df_deg
+from app.services.enrichment import ALL_LIBRARIES, enrich, libraries
+from app.services.figure_cache import cached_figures
+from app.services.gsea import gsea, running_sum
+from app.services.hashing import fingerprint
+
+# Query: the significant genes of the DEG analysis, tested against the GMT libraries in
+# settings.GENESET_DIR (one dropdown category per file, "All" for their union). The
+# background is every gene the DEG analysis tested.
+query_genes = df_deg.loc[df_deg["Significant"], "Gene"].tolist()
+background_genes = df_deg["Gene"].tolist()
+QUERY_FINGERPRINT = fingerprint(query_genes, background_genes)
+TOP_PATHWAYS = 10
+# Preranked GSEA runs on the full log2FC ranking of the DEG table.
+ranking = df_deg.set_index("Gene")["log2FC"]
+RANKING_FINGERPRINT = fingerprint(ranking)
+# The demo ranking has 30 genes, so sets are kept from 3 ranked members (default 15).
+GSEA_MIN_SIZE = 3
+
+gene_sets = {"All": ALL_LIBRARIES, **{name.title(): name for name in libraries.names()}}
+
+
+def enrichment_table(category):
+    df = enrich(gene_sets[category], query_genes, background_genes).head(TOP_PATHWAYS)
+    df = df.rename(columns={"gene_set": "Pathway", "p_value": "PValue", "overlap": "GeneCount"})
+    df["-log10(PValue)"] = -np.log10(df["PValue"].clip(lower=np.finfo(float).tiny))
+    return df
+
+
+def membership_matrix(df):
+    """Query genes x top pathways, 1 where the gene is a member (overlapping genes only)."""
+    members = {row.Pathway: row.genes.split(";") if row.genes else [] for row in df.itertuples()}
+    rows = sorted({g for genes in members.values() for g in genes})
+    return pd.DataFrame(
+        [[int(g in members[p]) for p in df["Pathway"]] for g in rows],
+        index=rows, columns=df["Pathway"].tolist(), dtype=int,
+    )
+
 
-# Simulated pathway enrichment results
-np.random.seed(42)
-all_pathways = [
-    "PI3K-Akt signaling", "MAPK signaling", "Apoptosis", "Cell Cycle",
-    "p53 signaling", "WNT signaling", "Notch signaling", "TGF-beta signaling"
-]
-p_values = np.sort(np.random.uniform(0.0001, 0.05, len(all_pathways)))
-gene_counts = np.random.randint(5, 25, len(all_pathways))
-base_df = pd.DataFrame({
-    "Pathway": all_pathways,
-    "PValue": p_values,
-    "GeneCount": gene_counts
-})
-base_df["-log10(PValue)"] = -np.log10(base_df["PValue"])
-
-# Simulated gene categories
-gene_sets = {
-    "All": base_df,
-    "Oncogenic": base_df.iloc[:5],
-    "Immune": base_df.iloc[2:],
-    "Metabolic": base_df.iloc[1:6]
-}
-
-# Simulated gene-pathway heatmap matrix
-genes = ["TP53", "KRAS", "PIK3CA", "BRAF", "PTEN", "RB1", "EGFR", "CDK4"]
-gene_pathway_matrix = pd.DataFrame(
-    np.random.choice([0, 1], size=(len(genes), len(all_pathways))),
-    index=genes, columns=all_pathways
+explanation_gsea = (
+    "Preranked GSEA walks down the genes ordered by log2 fold change and scores each pathway "
+    "by how strongly its genes concentrate at the top (positive NES) or bottom (negative NES) "
+    "of the list, against gene-label permutations. The curve shows the running enrichment "
+    "score of the top pathway; ticks mark its genes."
 )
 
+
 # Layout
 layout = html.Div([
     html.H3("Pathway Enrichment Analysis"),
@@ -58,21 +78,31 @@ layout = html.Div([
 
     html.H5("Gene-Pathway Membership"),
     dcc.Graph(id="pathway-heatmap"),
-    html.Div(id="pathway-heatmap-text"),
+    html.Div(id="pathway-heatmap-text", style={"marginBottom": "30px"}),
+
+    html.H5("Preranked GSEA (log2FC ranking)"),
+    dcc.Loading([
+        dcc.Graph(id="gsea-nes"),
+        dcc.Graph(id="gsea-running-sum"),
+    ]),
+    html.Div(explanation_gsea, id="gsea-text"),
 ])
 
 
 @callback(
     Output("pathway-bar", "figure"),
-    Output("pathway-bar-text", "children"),
     Output("pathway-dotplot", "figure"),
-    Output("pathway-dotplot-text", "children"),
     Output("pathway-heatmap", "figure"),
-    Output("pathway-heatmap-text", "children"),
     Input("pathway-category", "value")
 )
 def update_pathway_figures(category):
-    df = gene_sets[category]
+    # The library version is part of the figure cache key, so edited GMT files show up.
+    return pathway_figures(category, libraries.get(gene_sets[category]).version)
+
+
+@cached_figures("pathway.figures", QUERY_FINGERPRINT)
+def pathway_figures(category, _library_version):
+    df = enrichment_table(category)
 
     # Bar Plot
     fig_bar = px.bar(
@@ -84,32 +114,20 @@ def update_pathway_figures(category):
     )
     fig_bar.update_layout(template="plotly_dark", height=500)
 
-    explanation_bar = (
-        f"This bar plot shows the top pathways enriched in the selected gene set category: '{category}'. "
-        "Bar height reflects statistical strength using the -log10 transformation of P-values. "
-        "It enables easy comparison of biological relevance across pathways."
-    )
-
     # Dot Plot
     fig_dot = px.scatter(
         df,
         x="-log10(PValue)", y="Pathway",
         size="GeneCount", color="-log10(PValue)",
         color_continuous_scale="Viridis",
-        labels={"GeneCount": "Gene Count"},
+        hover_data=["q_value", "set_size"],
+        labels={"GeneCount": "Overlap", "q_value": "q-value", "set_size": "Set size"},
         title=f"Pathway Dot Plot – {category}"
     )
     fig_dot.update_layout(template="plotly_dark", height=500)
 
-    explanation_dot = (
-        f"This dot plot visualizes the significance and gene count for each enriched pathway in the '{category}' gene set. "
-        "Larger dots indicate more genes in a pathway; deeper colors indicate stronger enrichment. "
-        "This view is useful for prioritizing biologically dense and statistically robust pathways."
-    )
-
-    # Filter heatmap matrix to match selected pathways
-    selected_cols = df["Pathway"].values
-    matrix = gene_pathway_matrix[selected_cols]
+    # Which significant genes drive each of the top pathways
+    matrix = membership_matrix(df)
 
     fig_heatmap = px.imshow(
         matrix,
@@ -120,10 +138,79 @@ def update_pathway_figures(category):
     )
     fig_heatmap.update_layout(template="plotly_dark", height=500)
 
-    explanation_heatmap = (
-        f"This matrix shows which genes are involved in the selected '{category}' pathways. "
-        "It highlights overlap and multifunctionality. Blue cells mark gene membership in each pathway, "
-        "allowing insight into pathway redundancy and pleiotropy."
-    )
+    return fig_bar, fig_dot, fig_heatmap
 
-    return fig_bar, explanation_bar, fig_dot, explanation_dot, fig_heatmap, explanation_heatmap
+
+@callback(
+    Output("gsea-nes", "figure"),
+    Output("gsea-running-sum", "figure"),
+    Input("pathway-category", "value"),
+    background=True,
+    manager=background_callback_manager,
+)
+def update_gsea_figures(category):
+    # Runs as a background job: a cold GSEA permutes off the request thread, on a pool
+    # owned by the job's process.
+    with processes.session():
+        return gsea_figures(category, libraries.get(gene_sets[category]).version)
+
+
+@cached_figures("pathway.gsea", RANKING_FINGERPRINT)
+def gsea_figures(category, _library_version):
+    # Results are persisted per (ranking, library version): only the first visit permutes.
+    df = gsea(gene_sets[category], ranking, min_size=GSEA_MIN_SIZE).head(TOP_PATHWAYS)
+
+    fig_nes = px.bar(
+        df.sort_values("nes"),
+        x="nes", y="gene_set",
+        orientation="h",
+        color="q_value",
+        color_continuous_scale="Viridis_r",
+        hover_data=["es", "p_value", "size", "permutations"],
+        labels={"nes": "NES", "gene_set": "Pathway", "q_value": "q-value", "es": "ES",
+                "p_value": "p-value", "size": "Size"},
+        title=f"Top GSEA Pathways – {category}"
+    )
+    fig_nes.update_layout(template="plotly_dark", height=500)
+
+    fig_run = go.Figure()
+    if not df.empty:
+        top = df.iloc[0]
+        library = libraries.get(gene_sets[category])
+        members = library.members(list(library.set_names).index(top["gene_set"]))
+        curve = running_sum(ranking, members)
+        hits = curve.index.isin(members)
+        fig_run.add_trace(go.Scatter(x=np.arange(1, len(curve) + 1), y=curve.to_numpy(),
+                                     mode="lines", name="Running ES", text=curve.index))
+        fig_run.add_trace(go.Scatter(x=np.flatnonzero(hits) + 1, y=np.full(hits.sum(), curve.min() - 0.05),
+                                     mode="markers", marker=dict(symbol="line-ns-open", size=14),
+                                     name="Pathway genes", text=curve.index[hits]))
+        fig_run.update_layout(title=f"Running Enrichment Score – {top['gene_set']} (NES {top['nes']:.2f})")
+    fig_run.update_layout(template="plotly_dark", height=400,
+                          xaxis_title="Rank in log2FC ordering", yaxis_title="Enrichment score")
+
+    return fig_nes, fig_run
+
+
+# The explanations only interpolate the selected category: rendered in the browser.
+clientside_callback(
+    """
+    function(category) {
+        return [
+            `This bar plot shows the top pathways enriched in the selected gene set category: '${category}'. ` +
+            "Bar height reflects statistical strength using the -log10 transformation of P-values. " +
+            "It enables easy comparison of biological relevance across pathways.",
+            `This dot plot visualizes the significance and gene count for each enriched pathway in the '${category}' gene set. ` +
+            "Larger dots indicate more genes in a pathway; deeper colors indicate stronger enrichment. " +
+            "This view is useful for prioritizing biologically dense and statistically robust pathways.",
+            `This matrix shows which genes are involved in the selected '${category}' pathways. ` +
+            "It highlights overlap and multifunctionality. Blue cells mark gene membership in each pathway, " +
+            "allowing insight into pathway redundancy and pleiotropy."
+        ];
+    }
+    """,
+    Output("pathway-bar-text", "children"),
+    Output("pathway-dotplot-text", "children"),
+    Output("pathway-heatmap-text", "children"),
+    Input("pathway-category", "value"),
+)
@@ -1,11 +1,18 @@
 # pages/survival_analysis.py
 
-from dash import html, dcc, Input, Output, callback
+from dash import html, dcc, dash_table, Input, Output, callback
 import pandas as pd
 import numpy as np
-from lifelines import KaplanMeierFitter
-from lifelines.statistics import logrank_test
 import plotly.graph_objects as go
+from plotly.colors import qualitative
+
+from app.dash_app.callbacks_settings import background_callback_manager
+from app.services.cohorts import cohorts
+from app.services.concurrency import processes
+from app.services.survival import analyze
+from app.services.survival_scan import survival_scan
+
+SCAN_TOP_N = 20
 
 # Example survival data (hardcoded)
 np.random.seed(42)
@@ -19,7 +26,39 @@ df_survival = pd.DataFrame({
 layout = html.Div([
     html.H3("Survival Analysis"),
     dcc.Graph(id="km-plot"),
-    html.Div(id="logrank-result", style={"marginTop": "10px"})
+    html.Div(id="logrank-result", style={"marginTop": "10px"}),
+
+    html.H4("Genome-wide survival scan", style={"marginTop": "30px"}),
+    html.P(
+        "Every gene splits the demo cohort into high/low expression groups and is ranked by "
+        "its log-rank p-value; q-values are Benjamini-Hochberg adjusted. The optimal cutpoint "
+        "picks the best of several quantile splits per gene, so its p-values are optimistic."
+    ),
+    dcc.Dropdown(
+        id="scan-method",
+        options=[
+            {"label": "Median split", "value": "median"},
+            {"label": "Optimal cutpoint", "value": "optimal"},
+        ],
+        value="median",
+        clearable=False,
+        style={"width": "300px", "color": "black"},
+    ),
+    dcc.Loading(dash_table.DataTable(
+        id="scan-table",
+        columns=[
+            {"name": "Gene", "id": "gene"},
+            {"name": "Cutpoint", "id": "cutpoint", "type": "numeric", "format": {"specifier": ".3f"}},
+            {"name": "N high", "id": "n_high", "type": "numeric"},
+            {"name": "Hazard ratio", "id": "hazard_ratio", "type": "numeric", "format": {"specifier": ".2f"}},
+            {"name": "p-value", "id": "p_value", "type": "numeric", "format": {"specifier": ".2e"}},
+            {"name": "q-value", "id": "q_value", "type": "numeric", "format": {"specifier": ".2e"}},
+        ],
+        style_table={"overflowX": "auto", "marginTop": "10px"},
+        style_cell={"padding": "5px", "textAlign": "left"},
+        style_header={"backgroundColor": "#222", "color": "white", "fontWeight": "bold"},
+        style_data={"backgroundColor": "#333", "color": "white"},
+    )),
 ])
 
 
@@ -29,33 +68,42 @@ layout = html.Div([
     Input("km-plot", "id")
 )
 def update_km_plot(_):
-    kmf = KaplanMeierFitter()
+    # All groups' curves, bands and the k-group log-rank test in one vectorized pass.
+    result = analyze(df_survival, "time", "event", "group")
+    km, test = result.km, result.logrank
     fig = go.Figure()
 
-    group_dfs = {
-        name: group for name, group in df_survival.groupby("group")
-    }
-
-    for name, group in group_dfs.items():
-        kmf.fit(group["time"], event_observed=group["event"], label=name)
+    x = np.r_[0.0, km.times]
+    for i, name in enumerate(km.groups):
+        color = qualitative.Plotly[i % len(qualitative.Plotly)]
+        # Confidence band: upper edge, then lower edge filled up to it.
+        fig.add_trace(go.Scatter(
+            x=x, y=np.r_[1.0, km.upper[i]],
+            mode="lines", line=dict(width=0, shape="hv", color=color),
+            legendgroup=name, showlegend=False, hoverinfo="skip",
+        ))
         fig.add_trace(go.Scatter(
-            x=kmf.survival_function_.index,
-            y=kmf.survival_function_[name],
+            x=x, y=np.r_[1.0, km.lower[i]],
+            mode="lines", line=dict(width=0, shape="hv", color=color),
+            fill="tonexty", opacity=0.2,
+            legendgroup=name, showlegend=False, hoverinfo="skip",
+        ))
+        fig.add_trace(go.Scatter(
+            x=x,
+            y=np.r_[1.0, km.survival[i]],
             mode="lines",
+            line=dict(shape="hv", color=color),
+            legendgroup=name,
             name=name
         ))
 
-    # Log-rank test (only works for exactly 2 groups)
-    if len(group_dfs) == 2:
-        (name1, df1), (name2, df2) = list(group_dfs.items())
-        result = logrank_test(
-            df1["time"], df2["time"],
-            event_observed_A=df1["event"],
-            event_observed_B=df2["event"]
-        )
-        p_text = f"Log-rank p-value between {name1} and {name2}: {result.p_value:.4f}"
+    if len(km.groups) == 2:
+        name1, name2 = km.groups
+        p_text = f"Log-rank p-value between {name1} and {name2}: {test.p_value:.4f}"
+    elif len(km.groups) > 2:
+        p_text = f"Log-rank p-value across {len(km.groups)} groups (df={test.df}): {test.p_value:.4f}"
     else:
-        p_text = "Log-rank test only shown for 2 groups."
+        p_text = "Log-rank test needs at least 2 groups."
 
     fig.update_layout(
         title="Kaplan–Meier Survival Curve",
@@ -66,3 +114,19 @@ def update_km_plot(_):
     )
 
     return fig, p_text
+
+
+@callback(
+    Output("scan-table", "data"),
+    Input("scan-method", "value"),
+    background=True,
+    manager=background_callback_manager,
+    running=[(Output("scan-method", "disabled"), True, False)],
+)
+def update_scan_table(method):
+    # Runs as a background job, off the request thread; cached per cohort and method, so
+    # only the first run for each pays for the scan. The job is its own process, so it
+    # brings its own analysis pool.
+    with processes.session():
+        top = survival_scan(cohorts.get("demo"), method).head(SCAN_TOP_N)
+    return top.astype(object).where(top.notna(), None).to_dict("records")
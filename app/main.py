@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.wsgi import WSGIMiddleware
@@ -5,10 +7,29 @@ import dash_bootstrap_components as dbc
 from dash_extensions.enrich import DashProxy
 
 from app.dash_app.layout import serve_layout
-from app.api import delta_api
+from app.dash_app.callbacks_settings import dash_transforms
+from app.api import data, delta_api, query, survival
+from app.services import app_config
+from app.services.concurrency import processes
+from app.services.storage import replica_syncer
+from app.services.storage_clients import clients
+from app.services.settings import settings
+from app.services.wsgi_pool import PooledWSGIMiddleware, dash_pool
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    clients.warm_up(app_config.DATA_PATHS.values())
+    replica_syncer.start()
+    processes.start()
+    yield
+    processes.stop()
+    replica_syncer.stop()
+    clients.tokens.stop()
+
 
 # FastAPI app
-app = FastAPI(title="biomrktools-web")
+app = FastAPI(title="biomrktools-web", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -18,12 +39,16 @@ app.add_middleware(
 
 # Include FastAPI API endpoints
 app.include_router(delta_api.router)
+app.include_router(data.router)
+app.include_router(query.router)
+app.include_router(survival.router)
 
 # Dash app
 dash_app = DashProxy(
     __name__,
     requests_pathname_prefix="/dash/",
-    external_stylesheets=[dbc.themes.BOOTSTRAP]
+    external_stylesheets=[dbc.themes.BOOTSTRAP],
+    transforms=dash_transforms(),
 )
 
 # Set layout
@@ -32,5 +57,9 @@ dash_app.layout = serve_layout()
 # Import callbacks AFTER layout is set so they register properly
 from app.dash_app import callbacks
 
-# Mount Dash onto FastAPI
-app.mount("/dash", WSGIMiddleware(dash_app.server))
+# Mount Dash onto FastAPI. With the worker pool, Dash runs on its own bounded set of
+# threads (with admission control) instead of the threadpool the API endpoints use.
+if settings.DASH_WORKER_POOL:
+    app.mount("/dash", PooledWSGIMiddleware(dash_app.server, dash_pool))
+else:
+    app.mount("/dash", WSGIMiddleware(dash_app.server))
@@ -0,0 +1,121 @@
+# app/services/analysis_cache.py
+
+import hashlib
+import logging
+import time
+from typing import Any, Callable, Hashable, Optional
+
+from app.services.cache import CacheNamespace, caches
+from app.services.concurrency import executor
+from app.services.settings import settings
+from app.services.storage import DEFAULT_PARTITIONS, _table_path, open_table, read_delta_head
+
+logger = logging.getLogger(__name__)
+
+# Memory in front of the disk cache shared by every session and gunicorn worker.
+cache = caches["callbacks"]
+# A synchronous load waits at most this long for another worker loading the same key,
+# polling the shared cache, before loading on its own.
+LOAD_WAIT_SECONDS = 60.0
+LOAD_POLL_SECONDS = 0.05
+
+
+class StaleWhileRevalidate:
+    """Tiered-cache memoizer keyed by filters, validated against the Delta table version.
+
+    Entries younger than ``ttl`` are returned without touching storage. Older entries
+    (up to ``ttl + stale``) are returned immediately while one background refresh - across
+    all workers - re-probes the table version and reloads only if a new commit appeared.
+    Anything older is reloaded synchronously, by one worker per key: the others wait for
+    its result in the shared cache.
+    """
+
+    def __init__(self, cache: CacheNamespace, ttl: float, stale: float, prefix: str = "swr"):
+        self.cache = cache
+        self.ttl = ttl
+        self.stale = stale
+        self.prefix = prefix
+
+    def get(self, key: Hashable, version: Callable[[], int], load: Callable[[], Any]) -> Any:
+        return self.get_entry(key, version, load)["value"]
+
+    def get_entry(self, key: Hashable, version: Callable[[], int], load: Callable[[], Any]) -> dict:
+        """Like :meth:`get` but returns ``{"value", "version", "stored_at"}``."""
+        key = (self.prefix, key)
+        entry = self.cache.get(key)
+        if entry is not None:
+            age = time.time() - entry["stored_at"]
+            if age < self.ttl:
+                return entry
+            if age < self.ttl + self.stale:
+                # One refresh per key across workers: add() is atomic and fails if present.
+                if self.cache.add((self.prefix, "refreshing", key), True, expire=self.ttl):
+                    executor.submit(self._refresh, key, entry, version, load)
+                return entry
+        return self._load(key, entry, version, load)
+
+    def _refresh(self, key, entry: dict, version, load) -> None:
+        try:
+            self._revalidate(key, entry, version, load)
+        finally:
+            self.cache.delete((self.prefix, "refreshing", key))
+
+    def _load(self, key, entry: Optional[dict], version, load) -> dict:
+        marker = (self.prefix, "loading", key)
+        deadline = time.time() + LOAD_WAIT_SECONDS
+        while not self.cache.add(marker, True, expire=LOAD_WAIT_SECONDS):
+            if time.time() >= deadline:
+                return self._revalidate(key, entry, version, load)
+            time.sleep(LOAD_POLL_SECONDS)
+            fresh = self._fresh(key)
+            if fresh is not None:
+                return fresh
+        try:
+            # The previous holder may have stored the entry just before we took the marker.
+            return self._fresh(key) or self._revalidate(key, entry, version, load)
+        finally:
+            self.cache.delete(marker)
+
+    def _fresh(self, key) -> Optional[dict]:
+        entry = self.cache.get(key)
+        if entry is not None and time.time() - entry["stored_at"] < self.ttl:
+            return entry
+        return None
+
+    def _revalidate(self, key, entry: Optional[dict], version, load) -> dict:
+        try:
+            current = version()
+            if entry is not None and entry["version"] == current:
+                value = entry["value"]
+            else:
+                value = load()
+            entry = {"value": value, "version": current, "stored_at": time.time()}
+            self.cache.set(key, entry, expire=self.ttl + self.stale)
+            return entry
+        except Exception:
+            if entry is None:
+                raise
+            logger.exception("Background refresh failed for %s", key)
+            return entry
+
+
+analysis_loader = StaleWhileRevalidate(
+    cache,
+    ttl=settings.ANALYSIS_CACHE_TTL_SECONDS,
+    stale=settings.ANALYSIS_CACHE_STALE_SECONDS,
+    prefix="analysis",
+)
+
+
+def load_latest_entry(path: str = _table_path, partitions=DEFAULT_PARTITIONS) -> dict:
+    return analysis_loader.get_entry(
+        (path, repr(partitions)),
+        version=lambda: open_table(path).version(),
+        load=lambda: read_delta_head(path, partitions=partitions),
+    )
+
+
+def entry_key(path: str, partitions, version: int) -> str:
+    """Stable id of one (table, filters, version) result, e.g. for server-side stores."""
+    digest = hashlib.sha1(repr((path, partitions, version)).encode("utf-8")).hexdigest()
+    return f"analysis-{digest}"
@@ -10,6 +10,20 @@ BASE_PATHS = {
 }
 
 DATA_PATHS = {
-    "adeg": "master_catalog/adeg/analysis/log_adeg_summary"
+    "adeg": "master_catalog/adeg/analysis/log_adeg_summary",
+    "adeg_runs": "biomrk_master/adeg/analysis/log_adeg_summary",
 }
 
+
+MB = 1024 * 1024
+
+# Tiered cache namespaces (app/services/cache.py): per-worker memory budget, default TTL
+# in seconds (None = until evicted) and whether entries are also kept in the shared disk cache.
+CACHE_NAMESPACES = {
+    "tables": {"memory_bytes": 128 * MB, "ttl": 300, "disk": True},
+    "json": {"memory_bytes": 32 * MB, "ttl": 3600, "disk": False},
+    "figures": {"memory_bytes": 64 * MB, "ttl": 3600, "disk": True},
+    "callbacks": {"memory_bytes": 32 * MB, "ttl": None, "disk": True},
+    "tiles": {"memory_bytes": 128 * MB, "ttl": 3600, "disk": True},
+    "analysis": {"memory_bytes": 64 * MB, "ttl": None, "disk": True},
+}
@@ -0,0 +1,73 @@
+# app/services/bitsets.py
+
+from typing import Optional
+
+import numpy as np
+
+# popcount of every byte value, for numpy builds without np.bitwise_count (< 2.0).
+_BYTE_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1).astype(np.uint8)
+# Upper bound on the (rows x rows x words) intermediate of one pairwise block.
+MAX_BLOCK_WORDS = 1 << 20
+
+
+def popcount(words: np.ndarray, axis: Optional[int] = -1, dtype=np.int64) -> np.ndarray:
+    """Number of set bits in ``words`` (unsigned ints), summed over ``axis``."""
+    if hasattr(np, "bitwise_count"):
+        counts = np.bitwise_count(words)
+    else:
+        counts = _BYTE_POPCOUNT[words.view(np.uint8)].reshape(*words.shape, words.itemsize).sum(axis=-1)
+    return counts if axis is None else counts.sum(axis=axis, dtype=dtype)
+
+
+class BitMatrix:
+    """Boolean matrix with one bit per column, packed row-wise into 64-bit words.
+
+    A 20k x 10k matrix takes 25 MB instead of 200 MB as ``bool`` (1.6 GB as ``int64``),
+    and row intersections are ``&`` + popcount over ``ceil(columns / 64)`` words.
+    Padding bits past the last column are always zero.
+    """
+
+    def __init__(self, words: np.ndarray, n_cols: int):
+        self.words = words
+        self.n_cols = n_cols
+
+    @classmethod
+    def from_dense(cls, matrix) -> "BitMatrix":
+        dense = np.asarray(matrix) != 0
+        packed = np.packbits(dense, axis=1)
+        pad = -packed.shape[1] % 8
+        if pad:
+            packed = np.pad(packed, ((0, 0), (0, pad)))
+        return cls(np.ascontiguousarray(packed).view(np.uint64), dense.shape[1])
+
+    @property
+    def shape(self):
+        return self.words.shape[0], self.n_cols
+
+    @property
+    def nbytes(self) -> int:
+        return self.words.nbytes
+
+    def __getitem__(self, rows) -> "BitMatrix":
+        return BitMatrix(self.words[rows], self.n_cols)
+
+    def to_dense(self) -> np.ndarray:
+        return np.unpackbits(self.words.view(np.uint8), axis=1, count=self.n_cols).astype(bool)
+
+    def row_counts(self) -> np.ndarray:
+        """Set bits per row."""
+        return popcount(self.words)
+
+    def intersect_counts(self, other: "BitMatrix") -> np.ndarray:
+        """(len(self) x len(other)) counts of columns set in both rows.
+
+        Computed in row blocks so the broadcast ``&`` never exceeds ``MAX_BLOCK_WORDS``.
+        """
+        a, b = self.words, other.words
+        out = np.empty((a.shape[0], b.shape[0]), dtype=np.int64)
+        step = max(MAX_BLOCK_WORDS // max(b.shape[0] * a.shape[1], 1), 1)
+        # Narrow accumulator when no count can overflow it; the reduction is the hot loop.
+        dtype = np.uint16 if self.n_cols < 1 << 16 else np.int64
+        for i in range(0, a.shape[0], step):
+            out[i:i + step] = popcount(a[i:i + step, None, :] & b[None, :, :], dtype=dtype)
+        return out
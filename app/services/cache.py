@@ -0,0 +1,231 @@
+# app/services/cache.py
+
+import itertools
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import diskcache
+
+from app.services import app_config
+from app.services.settings import settings
+
+_MISSING = object()
+
+# L2: one diskcache shared by all gunicorn workers (and Dash's background callback manager).
+disk = diskcache.Cache(
+    settings.CACHE_DIR,
+    size_limit=settings.CACHE_DISK_SIZE_LIMIT,
+    eviction_policy="least-recently-used",
+    statistics=True,
+)
+
+
+# Containers longer than this are measured on an evenly spaced sample and extrapolated.
+SIZEOF_SAMPLE_ITEMS = 64
+
+
+def sizeof(value: Any, _seen: Optional[set] = None) -> int:
+    """Estimate of a value's in-memory size, without serializing it.
+
+    Buffers and arrays report their ``nbytes`` (plus their elements for object arrays),
+    pandas objects their deep ``memory_usage``; containers and plain objects are summed
+    recursively, each object once. Long containers are extrapolated from a sample.
+    """
+    if isinstance(value, (bytes, bytearray, memoryview, str)):
+        return len(value)
+    memory_usage = getattr(value, "memory_usage", None)  # pandas DataFrame / Series / Index
+    if callable(memory_usage):
+        usage = memory_usage(index=True, deep=True) if hasattr(value, "index") else memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+    if _seen is None:
+        _seen = set()
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+    nbytes = getattr(value, "nbytes", None)  # numpy arrays, pyarrow tables/arrays
+    if isinstance(nbytes, int):
+        if getattr(value, "dtype", None) == object:
+            return nbytes + _sizeof_items(value.flat, value.size, _seen)
+        return nbytes
+    size = sys.getsizeof(value, 64)
+    if isinstance(value, dict):
+        n = len(value)
+        return size + _sizeof_items(value.keys(), n, _seen) + _sizeof_items(value.values(), n, _seen)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + _sizeof_items(value, len(value), _seen)
+    if hasattr(value, "__dict__"):
+        return size + sizeof(vars(value), _seen)
+    return size
+
+
+def _sizeof_items(values, n: int, seen: set) -> int:
+    if n <= SIZEOF_SAMPLE_ITEMS:
+        return sum(sizeof(v, seen) for v in values)
+    sample = list(itertools.islice(values, 0, None, n // SIZEOF_SAMPLE_ITEMS))
+    return int(sum(sizeof(v, seen) for v in sample) * n / len(sample))
+
+
+class MemoryLRU:
+    """Per-worker LRU bounded by (approximate) bytes, with per-entry expiry."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = _MISSING) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, size, expires_at = item
+            if expires_at is not None and expires_at <= time.time():
+                del self._data[key]
+                self.bytes -= size
+                self.expirations += 1
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, expires_at: Optional[float] = None, size: Optional[int] = None) -> None:
+        size = sizeof(value) if size is None else size
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._data[key] = (value, size, expires_at)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted, _) = self._data.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class CacheNamespace:
+    """Two-level cache for one kind of data: in-memory L1 in front of the shared disk L2.
+
+    Keys are namespaced on disk as ``(name, key)``. ``ttl`` is the default expiry in
+    seconds (``None`` = until evicted); L2 hits are promoted into L1.
+    """
+
+    def __init__(self, name: str, memory_bytes: int, ttl: Optional[float] = None, use_disk: bool = True):
+        self.name = name
+        self.ttl = ttl
+        self.use_disk = use_disk
+        self.memory = MemoryLRU(memory_bytes)
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        self.sets = 0
+
+    def _disk_key(self, key: Hashable) -> tuple:
+        return (self.name, key)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self.memory.get(key)
+        if value is not _MISSING:
+            self.hits_memory += 1
+            return value
+        if self.use_disk:
+            value, expires_at = disk.get(self._disk_key(key), default=_MISSING, expire_time=True)
+            if value is not _MISSING:
+                self.hits_disk += 1
+                self.memory.set(key, value, expires_at)
+                return value
+        self.misses += 1
+        return default
+
+    def set(self, key: Hashable, value: Any, expire: Optional[float] = _MISSING) -> None:
+        expire = self.ttl if expire is _MISSING else expire
+        expires_at = time.time() + expire if expire is not None else None
+        self.sets += 1
+        self.memory.set(key, value, expires_at)
+        if self.use_disk:
+            disk.set(self._disk_key(key), value, expire=expire)
+
+    def add(self, key: Hashable, value: Any, expire: Optional[float] = None) -> bool:
+        """Store only if absent - atomic across workers when the namespace is disk-backed."""
+        if self.use_disk:
+            return disk.add(self._disk_key(key), value, expire=expire)
+        if self.memory.get(key) is not _MISSING:
+            return False
+        self.memory.set(key, value, time.time() + expire if expire is not None else None)
+        return True
+
+    def delete(self, key: Hashable) -> None:
+        self.memory.delete(key)
+        if self.use_disk:
+            disk.delete(self._disk_key(key))
+
+    def get_or_set(self, key: Hashable, compute: Callable[[], Any], expire: Optional[float] = _MISSING) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value, expire)
+        return value
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.use_disk:
+            for key in list(disk.iterkeys()):
+                if isinstance(key, tuple) and key and key[0] == self.name:
+                    disk.delete(key)
+
+    def stats(self) -> dict:
+        lookups = self.hits_memory + self.hits_disk + self.misses
+        return {
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory.bytes,
+            "memory_max_bytes": self.memory.max_bytes,
+            "memory_evictions": self.memory.evictions,
+            "memory_expirations": self.memory.expirations,
+            "hits_memory": self.hits_memory,
+            "hits_disk": self.hits_disk,
+            "misses": self.misses,
+            "hit_ratio": (self.hits_memory + self.hits_disk) / lookups if lookups else None,
+            "sets": self.sets,
+            "ttl": self.ttl,
+            "disk": self.use_disk,
+        }
+
+
+caches: Dict[str, CacheNamespace] = {
+    name: CacheNamespace(name, conf["memory_bytes"], conf.get("ttl"), conf.get("disk", True))
+    for name, conf in app_config.CACHE_NAMESPACES.items()
+}
+
+
+def stats() -> dict:
+    hits, misses = disk.stats()
+    return {
+        "namespaces": {name: ns.stats() for name, ns in caches.items()},
+        "disk": {
+            "bytes": disk.volume(),
+            "size_limit": disk.size_limit,
+            "entries": len(disk),
+            "hits": hits,
+            "misses": misses,
+        },
+    }
@@ -0,0 +1,72 @@
+# app/services/cohorts.py
+
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from app.services.hashing import fingerprint
+
+
+@dataclass
+class Cohort:
+    """Expression matrix (genes x samples) plus per-sample survival outcome."""
+    name: str
+    expression: pd.DataFrame  # index: genes, columns: samples
+    clinical: pd.DataFrame    # index: samples, columns include time/event
+    time: str = "time"
+    event: str = "event"
+    key: str = field(init=False)
+
+    def __post_init__(self):
+        self.clinical = self.clinical.loc[self.expression.columns]
+        # Identity of the data for result caches: a reloaded cohort with new data gets a new key.
+        self.key = fingerprint(self.name, self.expression, self.clinical[[self.time, self.event]])
+
+
+class CohortRegistry:
+    """Named cohorts, loaded on first use and kept for the life of the process."""
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Cohort]] = {}
+        self._cohorts: Dict[str, Cohort] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable[[], Cohort]) -> None:
+        self._loaders[name] = loader
+        self._cohorts.pop(name, None)
+
+    def names(self) -> List[str]:
+        return sorted(self._loaders)
+
+    def get(self, name: str) -> Cohort:
+        cohort = self._cohorts.get(name)
+        if cohort is None:
+            if name not in self._loaders:
+                raise KeyError(name)
+            with self._lock:
+                cohort = self._cohorts.get(name)
+                if cohort is None:
+                    cohort = self._cohorts[name] = self._loaders[name]()
+        return cohort
+
+
+def demo_cohort(n_genes: int = 20000, n_samples: int = 300, seed: int = 42) -> Cohort:
+    """Simulated cohort (like the pages' demo data) with a handful of prognostic genes."""
+    rng = np.random.default_rng(seed)
+    expression = rng.normal(size=(n_genes, n_samples)).astype(np.float32)
+    risk = expression[:10].sum(axis=0) / np.sqrt(10)  # Gene1..Gene10 drive hazard
+    time = rng.exponential(scale=10 * np.exp(-risk)).round(1)
+    event = rng.binomial(1, 0.7, size=n_samples)
+    samples = [f"Sample{i + 1}" for i in range(n_samples)]
+    return Cohort(
+        name="demo",
+        expression=pd.DataFrame(expression, index=[f"Gene{i + 1}" for i in range(n_genes)], columns=samples),
+        clinical=pd.DataFrame({"time": time, "event": event}, index=samples),
+    )
+
+
+cohorts = CohortRegistry()
+cohorts.register("demo", demo_cohort)
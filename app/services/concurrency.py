@@ -0,0 +1,146 @@
+# app/services/concurrency.py
+
+import asyncio
+import contextlib
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from app.services.cache import CacheNamespace
+from app.services.settings import settings
+
+# Blocking object-store reads run here instead of the shared anyio threadpool.
+executor = ThreadPoolExecutor(
+    max_workers=settings.BLOCKING_IO_WORKERS,
+    thread_name_prefix="blocking-io",
+)
+
+
+async def run_blocking(fn: Callable, *args, **kwargs) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+
+
+class SingleFlight:
+    """Coalesce concurrent identical calls onto one in-flight execution.
+
+    The first caller for a key schedules ``fn`` on the blocking executor; callers that
+    arrive with the same key while it runs await the same future and get the same
+    result (or exception). The key is dropped as soon as the call finishes, so this
+    never serves stale results - it only de-duplicates concurrent work.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        future = self._inflight.get(key)
+        if future is None:
+            self.executed += 1
+            future = asyncio.ensure_future(run_blocking(fn, *args, **kwargs))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # shield: a cancelled waiter must not cancel the read the others are waiting on
+        return await asyncio.shield(future)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+        }
+
+
+flight = SingleFlight()
+
+
+class ProcessPool:
+    """Worker processes shared by the CPU-bound analyses (survival scans, GSEA).
+
+    The pool is started explicitly, once per serving worker at boot (see ``main.lifespan``),
+    and uses the ``spawn`` start method: the server is threaded, and forking it would copy
+    locks held by other threads into the pool's processes. :meth:`map` only fans out in
+    the process that started the pool and runs jobs inline elsewhere. Dash background
+    callbacks run in a process forked per job, so they wrap their work in :meth:`session`.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pid: Optional[int] = None
+
+    def start(self) -> None:
+        if self.workers > 1 and not self.running:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+            )
+            self._pid = os.getpid()
+
+    def stop(self) -> None:
+        if self._executor is not None and self._pid == os.getpid():
+            self._executor.shutdown(cancel_futures=True)
+        self._executor = None
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None and self._pid == os.getpid()
+
+    @contextlib.contextmanager
+    def session(self):
+        """Run the block with the pool available, starting one for this process if needed.
+
+        A pool started here is shut down when the block exits. Workers are spawned on the
+        first :meth:`map` that fans out, so a block that hits the cache costs nothing.
+        """
+        started = not self.running
+        if started:
+            self.start()
+        try:
+            yield self
+        finally:
+            if started:
+                self.stop()
+
+    def map(self, fn: Callable, jobs: List[tuple]) -> list:
+        """``[fn(*args) for args in jobs]``, on the pool when there is more than one job."""
+        if not self.running or len(jobs) <= 1:
+            return [fn(*args) for args in jobs]
+        futures = [self._executor.submit(fn, *args) for args in jobs]
+        return [f.result() for f in futures]
+
+
+processes = ProcessPool(settings.ANALYSIS_WORKERS)
+
+_computing: Dict[Hashable, threading.Lock] = {}
+_computing_lock = threading.Lock()
+
+
+def cached_compute(cache: CacheNamespace, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+    """``cache[key]``, or ``fn(*args, **kwargs)`` stored under ``key`` on a miss.
+
+    Threads of this worker that miss on the same key wait for the first one and read its
+    result from the cache instead of computing it again.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value
+    with _computing_lock:
+        lock = _computing.setdefault(key, threading.Lock())
+    try:
+        with lock:
+            value = cache.get(key)
+            if value is None:
+                value = fn(*args, **kwargs)
+                cache.set(key, value)
+    finally:
+        with _computing_lock:
+            if _computing.get(key) is lock:
+                del _computing[key]
+    return value
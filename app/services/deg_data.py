@@ -0,0 +1,38 @@
+# app/services/deg_data.py
+
+import pandas as pd
+
+# Differential expression results of the demo analysis, shared by the DEG page (table,
+# volcano) and the pathway page (enrichment query, background and GSEA ranking).
+df_deg = pd.DataFrame([
+    ("MMP9", 3.2, 0.0000012, 0.0000012, True),
+    ("COL1A1", 2.9, 0.00015, 0.0002, True),
+    ("CDH1", -2.3, 0.0008, 0.001, True),
+    ("TP53INP1", -1.8, 0.002, 0.0025, True),
+    ("ACTB", 0.4, 0.3, 0.35, False),
+    ("BRCA1", 2.5, 0.00005, 0.00006, True),
+    ("EGFR", -1.7, 0.01, 0.015, True),
+    ("MYC", 3.0, 0.0001, 0.00012, True),
+    ("VEGFA", 1.5, 0.04, 0.045, True),
+    ("KRAS", -0.6, 0.5, 0.6, False),
+    ("BCL2", -2.1, 0.005, 0.006, True),
+    ("PTEN", 2.0, 0.0003, 0.00035, True),
+    ("AKT1", 1.8, 0.02, 0.025, True),
+    ("TP53", -3.1, 0.00002, 0.000025, True),
+    ("GATA3", -0.3, 0.3, 0.35, False),
+    ("FOXA1", 1.2, 0.06, 0.07, False),
+    ("ERBB2", 2.7, 0.0002, 0.00025, True),
+    ("CCND1", 1.0, 0.03, 0.035, True),
+    ("CDK4", -1.5, 0.008, 0.01, True),
+    ("SMAD4", 0.7, 0.09, 0.1, False),
+    ("PIK3CA", 2.6, 0.0001, 0.00012, True),
+    ("RB1", -1.9, 0.006, 0.007, True),
+    ("CTNNB1", -0.4, 0.25, 0.3, False),
+    ("NRAS", 1.4, 0.04, 0.045, True),
+    ("NOTCH1", -2.2, 0.003, 0.0035, True),
+    ("MTOR", 2.1, 0.0005, 0.0006, True),
+    ("MAPK1", -0.2, 0.15, 0.2, False),
+    ("FGFR1", 1.6, 0.035, 0.04, True),
+    ("JUN", -2.5, 0.002, 0.0022, True),
+    ("STAT3", 0.5, 0.2, 0.25, False)
+], columns=["Gene", "log2FC", "p-value", "adj. p-value", "Significant"])
@@ -0,0 +1,185 @@
+# app/services/delta_tables.py
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from urllib.parse import unquote, urlparse
+
+import pyarrow.dataset as ds
+import pyarrow.fs as pa_fs
+from deltalake import DeltaTable
+
+from app.services.settings import settings
+
+# Older snapshots kept open for in-progress cursors.
+MAX_PINNED_VERSIONS = 8
+# Storage options that only carry a short-lived credential. They are not part of a
+# handle's identity: a rotated token is swapped in by the prober (see _refresh).
+CREDENTIAL_OPTIONS = ("bearer_token",)
+
+
+def _split(storage_options: Optional[dict]):
+    """(options without short-lived credentials, the credentials) of ``storage_options``."""
+    if not storage_options:
+        return storage_options, None
+    settings_ = {k: v for k, v in storage_options.items() if k not in CREDENTIAL_OPTIONS}
+    credentials = {k: storage_options[k] for k in CREDENTIAL_OPTIONS if k in storage_options}
+    return settings_, credentials or None
+
+
+@dataclass
+class _Entry:
+    table: DeltaTable
+    storage_options: Optional[dict]
+    checked_at: float
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    # Latest options seen for this table; differs from storage_options only in credentials.
+    pending_options: Optional[dict] = None
+
+    def same_table(self, storage_options: Optional[dict]) -> bool:
+        return _split(self.storage_options)[0] == _split(storage_options)[0]
+
+    def stale_credentials(self, storage_options: Optional[dict]) -> bool:
+        return _split(self.storage_options)[1] != _split(storage_options)[1]
+
+
+class DeltaTableRegistry:
+    """Process-wide cache of opened DeltaTable handles.
+
+    Opening a DeltaTable replays the transaction log from object storage, so each
+    table is opened once per worker and afterwards only probed for new commits
+    (``update_incremental``) every ``refresh_seconds``.
+
+    Handles are keyed by their storage options minus short-lived credentials, so a
+    rotated Azure token does not make every caller reopen the table. delta-rs cannot
+    swap the credential of an open handle, so the thread that probes the table re-creates
+    it with the new token while the others keep using the current handle (the old token
+    stays valid for ``AZURE_TOKEN_REFRESH_MARGIN_SECONDS`` after the rotation).
+    """
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._entries: Dict[str, _Entry] = {}
+        self._pinned: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.checks = 0
+        self.rotations = 0
+
+    def get(self, uri: str, storage_options: Optional[dict] = None) -> DeltaTable:
+        entry = self._entries.get(uri)
+        if entry is None or not entry.same_table(storage_options):
+            return self._open(uri, storage_options)
+
+        self.hits += 1
+        if entry.stale_credentials(storage_options):
+            entry.pending_options = storage_options
+            self._refresh(entry)
+        elif time.monotonic() - entry.checked_at >= self.refresh_seconds:
+            self._refresh(entry)
+        return entry.table
+
+    def get_version(self, uri: str, version: int, storage_options: Optional[dict] = None) -> DeltaTable:
+        """Handle pinned to ``version`` (e.g. for paging through a consistent snapshot)."""
+        entry = self._entries.get(uri)
+        if entry is not None and entry.same_table(storage_options) and entry.table.version() == version:
+            self.hits += 1
+            return entry.table
+
+        key = (uri, version)
+        with self._lock:
+            pinned = self._pinned.get(key)
+            # Pinned snapshots are short-lived; one whose token was rotated is simply reopened.
+            if pinned is not None and pinned[1] == storage_options:
+                self._pinned.move_to_end(key)
+                self.hits += 1
+                return pinned[0]
+            self.misses += 1
+            table = DeltaTable(table_uri=uri, version=version, storage_options=storage_options)
+            self._pinned[key] = (table, storage_options)
+            while len(self._pinned) > MAX_PINNED_VERSIONS:
+                self._pinned.popitem(last=False)
+            return table
+
+    def _open(self, uri: str, storage_options: Optional[dict]) -> DeltaTable:
+        with self._lock:
+            entry = self._entries.get(uri)
+            if entry is not None and entry.same_table(storage_options):
+                self.hits += 1
+                return entry.table
+            self.misses += 1
+            table = DeltaTable(table_uri=uri, storage_options=storage_options)
+            self._entries[uri] = _Entry(table, storage_options, time.monotonic())
+            return table
+
+    def _refresh(self, entry: _Entry) -> None:
+        # Only one thread probes a given table; the others keep using the current snapshot.
+        if not entry.lock.acquire(blocking=False):
+            return
+        try:
+            options = entry.pending_options
+            if options is not None and entry.stale_credentials(options):
+                entry.table = DeltaTable(table_uri=entry.table.table_uri, storage_options=options)
+                entry.storage_options = options
+                entry.pending_options = None
+                self.rotations += 1
+                entry.checked_at = time.monotonic()
+                return
+            self.checks += 1
+            before = entry.table.version()
+            entry.table.update_incremental()
+            if entry.table.version() != before:
+                self.refreshes += 1
+            entry.checked_at = time.monotonic()
+        finally:
+            entry.lock.release()
+
+    def version(self, uri: str) -> Optional[int]:
+        """Version of the cached handle, without probing storage."""
+        entry = self._entries.get(uri)
+        return entry.table.version() if entry is not None else None
+
+    def invalidate(self, uri: Optional[str] = None) -> None:
+        with self._lock:
+            if uri is None:
+                self._entries.clear()
+                self._pinned.clear()
+            else:
+                self._entries.pop(uri, None)
+                for key in [k for k in self._pinned if k[0] == uri]:
+                    del self._pinned[key]
+
+    def stats(self) -> dict:
+        return {
+            "tables": {uri: e.table.version() for uri, e in self._entries.items()},
+            "pinned": [f"{uri}@{version}" for uri, version in self._pinned],
+            "hits": self.hits,
+            "misses": self.misses,
+            "checks": self.checks,
+            "refreshes": self.refreshes,
+            "credential_rotations": self.rotations,
+            "refresh_seconds": self.refresh_seconds,
+        }
+
+
+registry = DeltaTableRegistry(refresh_seconds=settings.DELTA_TABLE_REFRESH_SECONDS)
+
+
+def get_table(uri: str, storage_options: Optional[dict] = None, version: Optional[int] = None) -> DeltaTable:
+    if version is not None:
+        return registry.get_version(uri, version, storage_options)
+    return registry.get(uri, storage_options)
+
+
+def to_dataset(dt: DeltaTable, partitions=None) -> ds.Dataset:
+    """pyarrow dataset for ``dt``; tables on local disk (replicas) are read memory-mapped."""
+    uri = dt.table_uri
+    if uri.startswith("file://"):
+        root = unquote(urlparse(uri).path)
+        filesystem = pa_fs.SubTreeFileSystem(root, pa_fs.LocalFileSystem(use_mmap=True))
+        return dt.to_pyarrow_dataset(partitions=partitions, filesystem=filesystem)
+    return dt.to_pyarrow_dataset(partitions=partitions)
@@ -0,0 +1,210 @@
+# app/services/enrichment.py
+
+import hashlib
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.services.bitsets import BitMatrix, popcount
+from app.services.cache import caches
+from app.services.concurrency import cached_compute
+from app.services.hashing import fingerprint
+from app.services.settings import settings
+from app.services.stats import bh_fdr, hypergeom_sf
+
+logger = logging.getLogger(__name__)
+
+# Name of the library made of every GMT file in the directory.
+ALL_LIBRARIES = "all"
+ENRICHMENT_COLUMNS = ["gene_set", "description", "overlap", "set_size", "expected",
+                      "fold_enrichment", "p_value", "q_value", "genes"]
+
+result_cache = caches["analysis"]
+
+
+@dataclass
+class GeneSetLibrary:
+    """Gene sets indexed over their gene universe.
+
+    Membership is stored twice: as CSR (``indptr``/``indices`` into ``genes``, for
+    listing members) and as a :class:`BitMatrix` of sets x universe (for overlaps: one
+    ``&`` + popcount per set). ``version`` is a hash of the source files' contents and
+    keys the result cache, so editing a GMT file invalidates its results.
+    """
+    name: str
+    version: str
+    set_names: np.ndarray     # (S,)
+    descriptions: np.ndarray  # (S,)
+    genes: np.ndarray         # (U,) sorted universe
+    indptr: np.ndarray        # (S + 1,)
+    indices: np.ndarray       # (nnz,) sorted gene ids per set
+    bits: BitMatrix           # (S, U)
+
+    @classmethod
+    def from_sets(cls, name: str, version: str, sets: Dict[str, tuple]) -> "GeneSetLibrary":
+        """``sets``: gene set name -> (description, member genes)."""
+        names = list(sets)
+        lengths = np.array([len(g) for _, g in sets.values()], dtype=np.int64)
+        flat = np.asarray([gene for _, g in sets.values() for gene in g], dtype=object)
+        codes, uniques = pd.factorize(flat)
+        order = np.argsort(uniques.astype(str), kind="stable")
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        genes = np.asarray(uniques, dtype=str)[order]
+        # Sort members within each set and drop duplicates listed twice in the file.
+        owner = np.repeat(np.arange(len(names)), lengths)
+        ids = rank[codes]
+        keep = np.lexsort((ids, owner))
+        owner, ids = owner[keep], ids[keep]
+        first = np.r_[True, (owner[1:] != owner[:-1]) | (ids[1:] != ids[:-1])][:len(ids)]
+        owner, indices = owner[first], ids[first]
+        indptr = np.r_[0, np.cumsum(np.bincount(owner, minlength=len(names)))].astype(np.int64)
+        dense = np.zeros((len(names), len(genes)), dtype=bool)
+        dense[owner, indices] = True
+        return cls(
+            name=name,
+            version=version,
+            set_names=np.asarray(names, dtype=object),
+            descriptions=np.asarray([d for d, _ in sets.values()], dtype=object),
+            genes=genes,
+            indptr=indptr,
+            indices=indices,
+            bits=BitMatrix.from_dense(dense),
+        )
+
+    @property
+    def sizes(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def members(self, i: int) -> np.ndarray:
+        return self.genes[self.indices[self.indptr[i]:self.indptr[i + 1]]]
+
+    def mask(self, genes: Iterable[str]) -> np.ndarray:
+        """Boolean mask over the universe for a gene list (unknown genes are ignored)."""
+        query = np.unique(np.asarray(list(genes), dtype=str))
+        pos = np.searchsorted(self.genes, query)
+        hit = pos < len(self.genes)
+        hit[hit] = self.genes[pos[hit]] == query[hit]
+        mask = np.zeros(len(self.genes), dtype=bool)
+        mask[pos[hit]] = True
+        return mask
+
+
+def read_gmt(path) -> Dict[str, tuple]:
+    """GMT: one gene set per line, ``name<TAB>description<TAB>gene<TAB>gene...``."""
+    sets = {}
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            fields = [f.strip() for f in line.rstrip("\n").split("\t")]
+            if len(fields) < 3 or not fields[0]:
+                continue
+            sets[fields[0]] = (fields[1], [g for g in fields[2:] if g])
+    return sets
+
+
+def load_library(name: str, paths: List[Path]) -> GeneSetLibrary:
+    digest = hashlib.sha1()
+    sets: Dict[str, tuple] = {}
+    for path in sorted(paths):
+        digest.update(path.read_bytes())
+        sets.update(read_gmt(path))
+    library = GeneSetLibrary.from_sets(name, digest.hexdigest(), sets)
+    logger.info("Loaded gene set library %s: %d sets over %d genes", name, len(sets), len(library.genes))
+    return library
+
+
+class GeneSetLibraries:
+    """GMT libraries in a directory, one per ``<name>.gmt`` plus ``all`` for their union.
+
+    A library is loaded on first use and reloaded when one of its files changes
+    (checked by modification time).
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self._libraries: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _paths(self, name: str) -> List[Path]:
+        if name == ALL_LIBRARIES:
+            return sorted(self.directory.glob("*.gmt"))
+        path = self.directory / f"{name}.gmt"
+        return [path] if path.is_file() else []
+
+    def names(self) -> List[str]:
+        return sorted(p.stem for p in self.directory.glob("*.gmt"))
+
+    def get(self, name: str) -> GeneSetLibrary:
+        paths = self._paths(name)
+        if not paths:
+            raise KeyError(name)
+        stamp = tuple((str(p), os.stat(p).st_mtime_ns) for p in paths)
+        cached = self._libraries.get(name)
+        if cached is None or cached[0] != stamp:
+            with self._lock:
+                cached = self._libraries.get(name)
+                if cached is None or cached[0] != stamp:
+                    cached = self._libraries[name] = (stamp, load_library(name, paths))
+        return cached[1]
+
+
+def over_representation(library: GeneSetLibrary, genes: Iterable[str],
+                        background: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """Hypergeometric over-representation of ``genes`` in every set of ``library``.
+
+    The universe is ``background`` (e.g. all genes tested) intersected with the library's
+    genes, or the library's genes if no background is given. Overlaps and set sizes for
+    all sets come from one popcount pass over the bitset index; p-values are
+    P(X >= overlap). Sets with no member in the universe or no overlap with the query are
+    dropped, and q-values are Benjamini-Hochberg over the remaining sets. Sorted by p-value.
+    """
+    universe = library.mask(background) if background is not None else np.ones(len(library.genes), dtype=bool)
+    query = library.mask(genes) & universe
+    universe_bits = BitMatrix.from_dense(universe[None, :]).words
+    query_bits = BitMatrix.from_dense(query[None, :]).words
+
+    set_size = popcount(library.bits.words & universe_bits)
+    overlap = popcount(library.bits.words & query_bits)
+    n_universe, n_query = int(universe.sum()), int(query.sum())
+    p = hypergeom_sf(overlap, n_universe, set_size, n_query)
+    expected = set_size * n_query / max(n_universe, 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fold = np.where(expected > 0, overlap / expected, np.nan)
+
+    query_ids = np.flatnonzero(query)
+    hits = np.isin(library.indices, query_ids)
+    owner = np.repeat(np.arange(len(set_size)), library.sizes)
+    members = pd.Series(library.genes[library.indices[hits]]).groupby(owner[hits]).agg(";".join)
+
+    result = pd.DataFrame({
+        "gene_set": library.set_names,
+        "description": library.descriptions,
+        "overlap": overlap,
+        "set_size": set_size,
+        "expected": expected,
+        "fold_enrichment": fold,
+        "p_value": p,
+        "genes": members.reindex(np.arange(len(set_size)), fill_value="").to_numpy(),
+    })
+    result = result[(set_size > 0) & (overlap > 0)]
+    result = result.assign(q_value=bh_fdr(result["p_value"].to_numpy()))
+    return result[ENRICHMENT_COLUMNS].sort_values("p_value", kind="stable").reset_index(drop=True)
+
+
+def enrich(library_name: str, genes: Iterable[str], background: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """:func:`over_representation` against a named library, cached per (gene list, background,
+    library version) in the ``analysis`` namespace."""
+    library = libraries.get(library_name)
+    genes = sorted(set(genes))
+    bg = sorted(set(background)) if background is not None else None
+    key = ("enrichment", library.name, library.version, fingerprint(genes, bg))
+    return cached_compute(result_cache, key, over_representation, library, genes, bg)
+
+
+libraries = GeneSetLibraries(settings.GENESET_DIR)
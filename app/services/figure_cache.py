@@ -0,0 +1,59 @@
+# app/services/figure_cache.py
+
+import functools
+import json
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import plotly.graph_objects as go
+
+from app.services.cache import caches
+from app.services.hashing import fingerprint  # also re-exported for figure callbacks
+
+figure_cache = caches["figures"]
+
+
+@dataclass
+class _Figure:
+    value: dict  # plotly JSON as plain lists/dicts
+    nbytes: int  # length of that JSON, so the memory tier charges the real size
+
+
+def _encode(result: Any):
+    if isinstance(result, go.Figure):
+        # plotly's own encoder, i.e. exactly what Dash would send for this figure
+        text = result.to_json()
+        return _Figure(json.loads(text), len(text))
+    return result
+
+
+def _decode(item) -> Any:
+    return item.value if isinstance(item, _Figure) else item
+
+
+def cached_figures(name: str, *data_fingerprints: str) -> Callable:
+    """Memoize a figure callback on the fingerprint of its data and its arguments.
+
+    ``data_fingerprints`` identify the module-level data the callback reads (compute
+    them once with :func:`fingerprint`). Figures are stored as their plotly JSON parsed
+    back into plain dicts and lists, and that is what Dash receives, hit or miss. A hit
+    skips building the figure and Plotly's validation; Dash still re-encodes the dict,
+    which is cheap without numpy arrays or figure objects to walk. A miss pays one
+    ``to_json`` plus a parse on top of that encode, about what Dash spends encoding the
+    Figure itself. Multi-output callbacks must return a tuple; non-figure outputs are
+    cached as is.
+    """
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args):
+            key = ("figures", name, fingerprint(data_fingerprints, args))
+            cached = figure_cache.get(key)
+            if cached is None:
+                result = fn(*args)
+                multi = isinstance(result, tuple)
+                cached = (multi, [_encode(r) for r in result] if multi else _encode(result))
+                figure_cache.set(key, cached)
+            multi, items = cached
+            return tuple(_decode(i) for i in items) if multi else _decode(items)
+        return wrapper
+    return decorator
@@ -0,0 +1,37 @@
+# app/services/hashing.py
+
+import hashlib
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+
+def _update(h, value: Any) -> None:
+    if isinstance(value, pd.DataFrame):
+        h.update(repr((list(value.columns), list(map(str, value.dtypes)))).encode("utf-8"))
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, pd.Series):
+        h.update(repr((value.name, str(value.dtype))).encode("utf-8"))
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        h.update(repr((value.shape, str(value.dtype))).encode("utf-8"))
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        for k in sorted(value, key=repr):
+            _update(h, k)
+            _update(h, value[k])
+    elif isinstance(value, (list, tuple)):
+        h.update(f"{type(value).__name__}:{len(value)}".encode("utf-8"))
+        for item in value:
+            _update(h, item)
+    else:
+        h.update(repr(value).encode("utf-8"))
+
+
+def fingerprint(*parts: Any) -> str:
+    """Content hash of data frames, arrays and plain callback parameters."""
+    h = hashlib.sha1()
+    for part in parts:
+        _update(h, part)
+    return h.hexdigest()
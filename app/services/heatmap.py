@@ -0,0 +1,205 @@
+# app/services/heatmap.py
+
+import math
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from app.services.cache import caches
+from app.services.hashing import fingerprint
+
+# Largest grid (rows x columns of cells) sent to the browser for one render.
+MAX_ROWS = 300
+MAX_COLS = 300
+# Tiles are TILE_SIZE x TILE_SIZE aggregated cells of one level.
+TILE_SIZE = 256
+# Below this many visible rows the gene names are used as tick labels.
+MAX_ROW_LABELS = 60
+
+tile_cache = caches["tiles"]
+
+
+@dataclass
+class HeatmapView:
+    z: np.ndarray
+    x: np.ndarray  # cell centres in column-index coordinates
+    y: np.ndarray  # cell centres in row-index coordinates
+    row_factor: int
+    col_factor: int
+    x_range: Tuple[float, float]
+    y_range: Tuple[float, float]
+
+
+def _level(visible: float, budget: int) -> int:
+    # Power-of-two aggregation factors, so zooming reuses a small set of tile levels.
+    return 1 if visible <= budget else 2 ** math.ceil(math.log2(visible / budget))
+
+
+def block_mean(values: np.ndarray, row_factor: int, col_factor: int) -> np.ndarray:
+    """NaN-aware mean over ``row_factor`` x ``col_factor`` blocks (the last ones may be ragged)."""
+    if row_factor == 1 and col_factor == 1:
+        return values.astype(np.float32, copy=False)
+    finite = np.isfinite(values)
+    filled = np.where(finite, values, 0.0)
+    rows = np.arange(0, values.shape[0], row_factor)
+    cols = np.arange(0, values.shape[1], col_factor)
+    sums = np.add.reduceat(np.add.reduceat(filled, rows, axis=0), cols, axis=1)
+    counts = np.add.reduceat(np.add.reduceat(finite.astype(np.int32), rows, axis=0), cols, axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (sums / counts).astype(np.float32)
+
+
+class HeatmapTiler:
+    """Serves a large matrix as an aggregated overview plus zoom-dependent tiles.
+
+    Nothing larger than ``max_rows`` x ``max_cols`` cells is ever rendered. The overview
+    is either the block-mean of the whole matrix (``overview="mean"``) or the
+    ``max_rows`` most variable rows with block-mean columns (``overview="variance"``).
+    A zoomed view picks the coarsest power-of-two level that still gives ~one cell per
+    budgeted pixel and assembles it from ``TILE_SIZE`` tiles, cached per level in the
+    ``tiles`` cache namespace and shared by all sessions.
+    """
+
+    def __init__(self, frame: pd.DataFrame, max_rows: int = MAX_ROWS, max_cols: int = MAX_COLS,
+                 overview: str = "mean"):
+        if overview not in ("mean", "variance"):
+            raise ValueError(f"Unknown overview '{overview}' (expected 'mean' or 'variance')")
+        self.values = frame.to_numpy(dtype=np.float32)
+        self.row_labels = np.asarray(frame.index.astype(str))
+        self.col_labels = np.asarray(frame.columns.astype(str))
+        self.max_rows = max_rows
+        self.max_cols = max_cols
+        self.overview_mode = overview
+        self.key = fingerprint(frame)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.values.shape
+
+    @property
+    def fits(self) -> bool:
+        """Whether the whole matrix is within the render budget (no tiling needed)."""
+        return self.shape[0] <= self.max_rows and self.shape[1] <= self.max_cols
+
+    def tile(self, row_factor: int, col_factor: int, ti: int, tj: int) -> np.ndarray:
+        key = (self.key, row_factor, col_factor, ti, tj)
+        tile = tile_cache.get(key)
+        if tile is None:
+            span_r, span_c = TILE_SIZE * row_factor, TILE_SIZE * col_factor
+            block = self.values[ti * span_r:(ti + 1) * span_r, tj * span_c:(tj + 1) * span_c]
+            tile = block_mean(block, row_factor, col_factor)
+            tile_cache.set(key, tile)
+        return tile
+
+    def _cells(self, row_factor: int, col_factor: int, r0: int, r1: int, c0: int, c1: int) -> np.ndarray:
+        """Aggregated cells [r0, r1) x [c0, c1) of one level, assembled from tiles."""
+        rows = []
+        for ti in range(r0 // TILE_SIZE, (r1 - 1) // TILE_SIZE + 1):
+            row = [self.tile(row_factor, col_factor, ti, tj)
+                   for tj in range(c0 // TILE_SIZE, (c1 - 1) // TILE_SIZE + 1)]
+            rows.append(np.concatenate(row, axis=1))
+        grid = np.concatenate(rows, axis=0)
+        dr, dc = (r0 // TILE_SIZE) * TILE_SIZE, (c0 // TILE_SIZE) * TILE_SIZE
+        return grid[r0 - dr:r1 - dr, c0 - dc:c1 - dc]
+
+    @staticmethod
+    def _centres(start: int, stop: int, factor: int, n: int) -> np.ndarray:
+        lo = np.arange(start, stop) * factor
+        return (lo + np.minimum(lo + factor, n) - 1) / 2.0
+
+    def view(self, y_range: Optional[Tuple[float, float]] = None,
+             x_range: Optional[Tuple[float, float]] = None) -> HeatmapView:
+        """Cells covering the given row/column index ranges (``None`` = whole axis)."""
+        n, m = self.shape
+        y0, y1 = sorted(y_range) if y_range else (-0.5, n - 0.5)
+        x0, x1 = sorted(x_range) if x_range else (-0.5, m - 0.5)
+        rows = (max(int(math.floor(y0 + 0.5)), 0), min(int(math.ceil(y1 + 0.5)), n))
+        cols = (max(int(math.floor(x0 + 0.5)), 0), min(int(math.ceil(x1 + 0.5)), m))
+        if rows[0] >= rows[1] or cols[0] >= cols[1]:
+            rows, cols = (0, n), (0, m)
+
+        fr = _level(rows[1] - rows[0], self.max_rows)
+        fc = _level(cols[1] - cols[0], self.max_cols)
+        r0, r1 = rows[0] // fr, -(-rows[1] // fr)
+        c0, c1 = cols[0] // fc, -(-cols[1] // fc)
+        return HeatmapView(
+            z=self._cells(fr, fc, r0, r1, c0, c1),
+            x=self._centres(c0, c1, fc, m),
+            y=self._centres(r0, r1, fr, n),
+            row_factor=fr, col_factor=fc,
+            x_range=(x0, x1), y_range=(y0, y1),
+        )
+
+    def overview(self) -> HeatmapView:
+        if self.overview_mode == "mean" or self.shape[0] <= self.max_rows:
+            return self.view()
+        key = (self.key, "top-variance", self.max_rows, self.max_cols)
+        cached = tile_cache.get(key)
+        if cached is None:
+            variance = np.nanvar(self.values, axis=1)
+            top = np.sort(np.argsort(variance)[::-1][:self.max_rows])
+            fc = _level(self.shape[1], self.max_cols)
+            cached = (top, block_mean(self.values[top], 1, fc), fc)
+            tile_cache.set(key, cached)
+        top, z, fc = cached
+        n, m = self.shape
+        return HeatmapView(
+            z=z, x=self._centres(0, z.shape[1], fc, m), y=top.astype(float),
+            row_factor=1, col_factor=fc,
+            x_range=(-0.5, m - 0.5), y_range=(-0.5, n - 0.5),
+        )
+
+
+def is_zoom_event(relayout: Optional[dict]) -> bool:
+    """Whether a ``relayoutData`` event changed an axis range (not e.g. autosize or dragmode)."""
+    return bool(relayout) and any(k.startswith(("xaxis.range", "yaxis.range", "xaxis.autorange", "yaxis.autorange"))
+                                  for k in relayout)
+
+
+def parse_relayout(relayout: Optional[dict]):
+    """(y_range, x_range) from a ``relayoutData`` event; ``None`` means autorange."""
+    if not relayout:
+        return None, None
+
+    def _axis(name):
+        if relayout.get(f"{name}.autorange"):
+            return None
+        if f"{name}.range[0]" in relayout:
+            return relayout[f"{name}.range[0]"], relayout[f"{name}.range[1]"]
+        if f"{name}.range" in relayout:
+            return tuple(relayout[f"{name}.range"])
+        return None
+
+    return _axis("yaxis"), _axis("xaxis")
+
+
+def heatmap_figure(tiler: HeatmapTiler, view: HeatmapView, title: str,
+                   colorbar_title: str = "Expression (Z-score)") -> go.Figure:
+    aggregated = view.row_factor > 1 or view.col_factor > 1
+    fig = go.Figure(go.Heatmap(
+        z=view.z, x=view.x, y=view.y,
+        colorscale="RdBu_r",
+        colorbar=dict(title=colorbar_title, thickness=20, len=0.75, y=0.5),
+        hovertemplate="row %{y:.0f}<br>col %{x:.0f}<br>value %{z:.3f}<extra></extra>",
+    ))
+    level = f" (block mean {view.row_factor}x{view.col_factor})" if aggregated else ""
+    fig.update_layout(
+        template="plotly_dark",
+        height=800,
+        title=f"{title}{level}",
+        margin=dict(t=100, l=20, r=20, b=50),
+        # Keep the user's zoom while tiles for the new range are swapped in.
+        uirevision=tiler.key,
+        xaxis=dict(domain=[0.05, 0.95], range=list(view.x_range), title="Sample"),
+        yaxis=dict(domain=[0.05, 0.95], range=list(view.y_range)[::-1], title="Gene"),
+    )
+    if not aggregated and len(view.y) <= MAX_ROW_LABELS:
+        idx = view.y.astype(int)
+        fig.update_yaxes(tickmode="array", tickvals=idx, ticktext=tiler.row_labels[idx])
+    if view.col_factor == 1 and len(view.x) <= MAX_ROW_LABELS:
+        idx = view.x.astype(int)
+        fig.update_xaxes(tickmode="array", tickvals=idx, ticktext=tiler.col_labels[idx], tickangle=0)
+    return fig
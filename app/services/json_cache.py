@@ -0,0 +1,23 @@
+# app/services/json_cache.py
+
+import json
+from dataclasses import dataclass
+from typing import Any
+
+from app.services.cache import caches
+
+
+@dataclass
+class CachedJson:
+    value: Any
+    body: bytes
+
+
+def encode(value: Any) -> bytes:
+    # Same encoding as starlette's JSONResponse, so cached bodies are byte-identical.
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+# Keys are (table uri, delta version, analysis_id, column, field); a new table version
+# simply produces new keys and the old ones age out of the namespace's memory LRU.
+json_cache = caches["json"]
@@ -0,0 +1,143 @@
+# app/services/latest_index.py
+
+import json
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import unquote
+
+import pyarrow.dataset as ds
+
+from app.services.delta_tables import get_table, to_dataset
+
+
+@dataclass
+class LatestRun:
+    timestamp: datetime
+    path: str
+    row: int
+
+
+class LatestRunIndex:
+    """analysis_id -> latest run (timestamp, data file, row position) for one Delta table.
+
+    The index is built once from a full scan of ``analysis_id``/``timestamp`` and is then
+    advanced by reading only the commit files added to ``_delta_log`` since the indexed
+    version: rows of newly added files are folded in, and analyses whose latest row lived
+    in a removed file are re-resolved with a filtered scan.
+    """
+
+    def __init__(self, uri: str | Callable[[], str], storage_options: Optional[dict] | Callable[[], Optional[dict]] = None,
+                 key_column: str = "analysis_id", order_column: str = "timestamp"):
+        self.uri = uri
+        self.storage_options = storage_options
+        self.key_column = key_column
+        self.order_column = order_column
+        self.version: Optional[int] = None
+        self._uri: Optional[str] = None
+        # (entries, fragments, dataset), replaced as a whole so readers never see a partial index.
+        self._snapshot: tuple = ({}, {}, None)
+        self._lock = threading.Lock()
+
+    def refresh(self) -> int:
+        # uri and storage_options may be callables so a local replica that becomes ready
+        # and rotated credentials are picked up.
+        uri = self.uri() if callable(self.uri) else self.uri
+        options = self.storage_options() if callable(self.storage_options) else self.storage_options
+        dt = get_table(uri, options)
+        version = dt.version()
+        if version == self.version and uri == self._uri:
+            return version
+
+        with self._lock:
+            if version == self.version and uri == self._uri:
+                return version
+            dataset = to_dataset(dt)
+            fragments = {f.path: f for f in dataset.get_fragments()}
+            # Fragment paths differ between the remote table and its replica: rebuild on a switch.
+            resume = self.version is not None and uri == self._uri
+            changes = self._read_commits(dataset, self.version, version) if resume else None
+            if changes is None:
+                entries, used = self._rebuild(dataset, fragments)
+            else:
+                added, removed = changes
+                entries, used = self._advance(dataset, fragments, added, removed)
+            self._snapshot = (entries, used, dataset)
+            self._uri = uri
+            self.version = version
+        return version
+
+    def get(self, key: str) -> Optional[LatestRun]:
+        return self._snapshot[0].get(key)
+
+    def keys(self) -> List[str]:
+        return list(self._snapshot[0])
+
+    def read(self, key: str, columns: Optional[List[str]] = None) -> Optional[dict]:
+        """Fetch the latest row for ``key`` straight from its data file."""
+        self.refresh()
+        entries, fragments, dataset = self._snapshot
+        entry = entries.get(key)
+        if entry is None:
+            return None
+        rows = ds.Scanner.from_fragment(fragments[entry.path], schema=dataset.schema, columns=columns).take([entry.row])
+        return rows.to_pylist()[0]
+
+    def _read_commits(self, dataset: ds.Dataset, start: int, end: int):
+        added, removed = set(), set()
+        for v in range(start + 1, end + 1):
+            try:
+                with dataset.filesystem.open_input_stream(f"_delta_log/{v:020d}.json") as f:
+                    lines = f.read().decode("utf-8").splitlines()
+            except (FileNotFoundError, OSError):
+                # Commit already cleaned up behind a checkpoint: fall back to a rebuild.
+                return None
+            for line in lines:
+                if not line.strip():
+                    continue
+                action = json.loads(line)
+                if "add" in action:
+                    path = unquote(action["add"]["path"])
+                    added.add(path)
+                    removed.discard(path)
+                elif "remove" in action:
+                    path = unquote(action["remove"]["path"])
+                    removed.add(path)
+                    added.discard(path)
+        return added, removed
+
+    def _rebuild(self, dataset: ds.Dataset, fragments: Dict[str, ds.Fragment]):
+        entries, used = {}, {}
+        self._fold(dataset, fragments, fragments.keys(), entries, used)
+        return entries, used
+
+    def _advance(self, dataset, fragments, added, removed):
+        current, previous, _ = self._snapshot
+        stale = {k for k, e in current.items() if e.path in removed}
+        entries = {k: e for k, e in current.items() if k not in stale}
+        # Fragment objects are bound to the dataset's filesystem, so re-bind the kept ones.
+        used = {p: fragments[p] for p in previous if p in fragments}
+
+        self._fold(dataset, fragments, [p for p in added if p in fragments], entries, used)
+        if stale:
+            expr = ds.field(self.key_column).isin(list(stale))
+            self._fold(dataset, fragments, [f.path for f in dataset.get_fragments(filter=expr)], entries, used)
+        return entries, used
+
+    def _fold(self, dataset, fragments, paths: Iterable[str], entries: Dict[str, LatestRun],
+              used: Dict[str, ds.Fragment]) -> None:
+        """Fold the rows of ``paths`` into ``entries`` (and the fragments they point at into ``used``)."""
+        columns = [self.key_column, self.order_column]
+        for path in paths:
+            fragment = fragments[path]
+            table = ds.Scanner.from_fragment(fragment, schema=dataset.schema, columns=columns).to_table()
+            keys = table.column(self.key_column).to_pylist()
+            times = table.column(self.order_column).to_pylist()
+            for row, (key, ts) in enumerate(zip(keys, times)):
+                if key is None or ts is None:
+                    continue
+                current = entries.get(key)
+                if current is None or ts > current.timestamp:
+                    used[path] = fragment
+                    entries[key] = LatestRun(ts, path, row)
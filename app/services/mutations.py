@@ -0,0 +1,158 @@
+# app/services/mutations.py
+
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.services.bitsets import BitMatrix
+from app.services.cache import caches
+from app.services.concurrency import cached_compute
+from app.services.hashing import fingerprint
+from app.services.stats import hypergeom_cdf, hypergeom_logpmf, hypergeom_sf
+
+# Genes per side of one pairwise block.
+PAIR_BLOCK = 512
+PAIR_COLUMNS = ["gene_a", "gene_b", "both", "only_a", "only_b", "neither", "log2_odds_ratio", "p_value"]
+
+result_cache = caches["analysis"]
+
+
+@dataclass
+class MutationPairs:
+    cooccurring: pd.DataFrame
+    exclusive: pd.DataFrame
+    genes_tested: int
+    pairs_tested: int
+
+
+class _TopK:
+    """Running k smallest (p_value, -|log2 OR|) rows over the pair blocks."""
+
+    def __init__(self, k: int):
+        self.k = k
+        self.p = np.empty(0)
+        self.effect = np.empty(0)
+        self.rows = np.empty((0, 7))
+
+    @property
+    def threshold(self) -> float:
+        """p-value a new pair has to reach to enter the top-k."""
+        return self.p[-1] if len(self.p) == self.k else np.inf
+
+    def push(self, p: np.ndarray, effect: np.ndarray, rows: np.ndarray):
+        p = np.concatenate([self.p, p])
+        effect = np.concatenate([self.effect, effect])
+        rows = np.concatenate([self.rows, rows])
+        keep = np.lexsort((-np.abs(effect), p))[:self.k]
+        self.p, self.effect, self.rows = p[keep], effect[keep], rows[keep]
+
+
+class MutationStore:
+    """Binary gene x sample mutation matrix, bit-packed (one bit per sample).
+
+    Pairwise co-occurrence is ``&`` + popcount over packed rows, computed block by block,
+    so the dense gene x gene matrix is never built; only the per-block candidates for
+    the top-k queries are kept.
+    """
+
+    def __init__(self, frame: pd.DataFrame):
+        self.genes = np.asarray(frame.index.astype(str))
+        self.samples = np.asarray(frame.columns.astype(str))
+        self.bits = BitMatrix.from_dense(frame.to_numpy())
+        self.counts = self.bits.row_counts()
+        self.key = fingerprint(frame)
+        self._index = {g: i for i, g in enumerate(self.genes)}
+
+    @property
+    def n_samples(self) -> int:
+        return len(self.samples)
+
+    def frequency(self) -> pd.Series:
+        """Mutated samples per gene."""
+        return pd.Series(self.counts, index=self.genes)
+
+    def _rows(self, genes: Optional[List[str]]) -> np.ndarray:
+        if genes is None:
+            return np.arange(len(self.genes))
+        return np.array([self._index[g] for g in genes], dtype=np.int64)
+
+    def dense(self, genes: Optional[List[str]] = None) -> pd.DataFrame:
+        rows = self._rows(genes)
+        return pd.DataFrame(self.bits[rows].to_dense().astype(np.int8), index=self.genes[rows], columns=self.samples)
+
+    def comutation_counts(self, genes: Optional[List[str]] = None) -> pd.DataFrame:
+        """Samples mutated in both genes, for a (display-sized) gene subset; diagonal zeroed."""
+        rows = self._rows(genes)
+        bits = self.bits[rows]
+        counts = bits.intersect_counts(bits)
+        np.fill_diagonal(counts, 0)
+        labels = self.genes[rows]
+        return pd.DataFrame(counts, index=labels, columns=labels)
+
+    def _block_stats(self, i: np.ndarray, j: np.ndarray, same: bool):
+        both = self.bits[i].intersect_counts(self.bits[j])
+        ii, jj = np.triu_indices(len(i), k=1) if same else np.indices(both.shape).reshape(2, -1)
+        both = both[ii, jj].astype(float)
+        ka, kb = self.counts[i][ii].astype(float), self.counts[j][jj].astype(float)
+        n = float(self.n_samples)
+        only_a, only_b = ka - both, kb - both
+        neither = n - ka - kb + both
+        # Haldane-Anscombe correction keeps the odds ratio finite for empty cells.
+        log2_or = np.log2(((both + 0.5) * (neither + 0.5)) / ((only_a + 0.5) * (only_b + 0.5)))
+        rows = np.column_stack([i[ii], j[jj], both, only_a, only_b, neither, log2_or])
+        return rows, both, ka, kb, n, log2_or
+
+    def pair_tests(self, top_k: int = 50, min_mutated: int = 2, block: int = PAIR_BLOCK) -> MutationPairs:
+        """One-sided Fisher's exact tests for every gene pair; the top-k pairs each way.
+
+        Genes mutated in fewer than ``min_mutated`` samples (or in all but that many) are
+        skipped as too rare (or too common) to test. A pair is a co-occurrence
+        candidate when its odds ratio is > 1 (p = P(X >= both)) and an exclusivity
+        candidate when it is < 1 (p = P(X <= both)). Exact tails are only evaluated for
+        pairs that can still enter the top-k (see the pmf bound below). Results are cached per matrix and
+        parameters in the ``analysis`` namespace.
+        """
+        key = ("mutation-pairs", self.key, top_k, min_mutated)
+        return cached_compute(result_cache, key, self._pair_tests, top_k, min_mutated, block)
+
+    def _pair_tests(self, top_k: int, min_mutated: int, block: int) -> MutationPairs:
+        eligible = np.flatnonzero((self.counts >= min_mutated) & (self.counts <= self.n_samples - min_mutated))
+        blocks = [eligible[s:s + block] for s in range(0, eligible.size, block)]
+        cooccurring, exclusive = _TopK(top_k), _TopK(top_k)
+        pairs = 0
+        for bi, i in enumerate(blocks):
+            for j in blocks[bi:]:
+                rows, both, ka, kb, n, log2_or = self._block_stats(i, j, same=j is i)
+                pairs += len(rows)
+                for top, side, test in ((cooccurring, log2_or > 0, hypergeom_sf),
+                                        (exclusive, log2_or < 0, hypergeom_cdf)):
+                    idx = np.flatnonzero(side)
+                    # A one-sided tail is at least the pmf of its first term, so pairs whose
+                    # pmf is already above the current k-th p-value cannot enter the top-k.
+                    bound = hypergeom_logpmf(both[idx], n, ka[idx], kb[idx])
+                    idx = idx[bound <= np.log(top.threshold)]
+                    p = test(both[idx], n, ka[idx], kb[idx])
+                    top.push(p, log2_or[idx], rows[idx])
+
+        return MutationPairs(
+            cooccurring=self._frame(cooccurring),
+            exclusive=self._frame(exclusive),
+            genes_tested=int(eligible.size),
+            pairs_tested=pairs,
+        )
+
+    def _frame(self, top: _TopK) -> pd.DataFrame:
+        rows = top.rows
+        frame = pd.DataFrame({
+            "gene_a": self.genes[rows[:, 0].astype(np.int64)],
+            "gene_b": self.genes[rows[:, 1].astype(np.int64)],
+            "both": rows[:, 2].astype(np.int64),
+            "only_a": rows[:, 3].astype(np.int64),
+            "only_b": rows[:, 4].astype(np.int64),
+            "neither": rows[:, 5].astype(np.int64),
+            "log2_odds_ratio": rows[:, 6],
+            "p_value": top.p,
+        })
+        return frame[PAIR_COLUMNS]
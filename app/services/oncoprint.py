@@ -0,0 +1,125 @@
+# app/services/oncoprint.py
+
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+import plotly.graph_objects as go
+
+from app.services.cache import caches
+from app.services.concurrency import cached_compute
+from app.services.heatmap import block_mean
+from app.services.mutations import MutationStore
+
+# Used until the browser has reported the graph's width.
+DEFAULT_WIDTH = 1200
+# Horizontal pixels per drawn column; below this columns are aggregated.
+MIN_COLUMN_PX = 2
+ROW_HEIGHT = 28
+
+order_cache = caches["analysis"]
+
+
+@dataclass
+class Oncoprint:
+    genes: List[str]
+    frequency: np.ndarray  # (G,) fraction of samples mutated
+    z: np.ndarray          # (G, C) fraction of samples mutated in each drawn column
+    first: np.ndarray      # (C,) first / last sample of each column
+    last: np.ndarray
+    factor: int            # samples per drawn column
+    n_samples: int
+
+
+def memo_sort(mutated: np.ndarray) -> np.ndarray:
+    """Sample order of a memo-sorted oncoprint for ``mutated`` (genes x samples, bool).
+
+    Rows are expected in display order (most frequent gene first). Samples sort by
+    their mutation pattern read as a binary number over the rows - mutated before
+    wild-type in the first gene, ties broken by the second, and so on - then by the
+    number of mutated rows, which keeps heavily altered samples left within a pattern.
+    """
+    # np.lexsort sorts by the last key first.
+    keys = np.vstack([-mutated.sum(axis=0), ~mutated[::-1]])
+    return np.lexsort(keys)
+
+
+class OncoprintEngine:
+    """Memo-sorted, viewport-sized oncoprints over a :class:`MutationStore`.
+
+    The gene and sample orderings are computed once per gene selection and cached in the
+    ``analysis`` namespace; rendering for a given width is a gather plus a block mean
+    over ``factor`` adjacent sorted samples, so the payload is at most ~``width /
+    MIN_COLUMN_PX`` columns however many samples the cohort has.
+    """
+
+    def __init__(self, store: MutationStore):
+        self.store = store
+
+    def default_genes(self, n: int = 20) -> List[str]:
+        top = np.argsort(-self.store.counts, kind="stable")[:n]
+        return self.store.genes[top].tolist()
+
+    def ordering(self, genes: Optional[List[str]] = None):
+        """(genes by descending frequency, memo-sorted sample indices) for a selection.
+
+        Genes with equal frequency are ordered by name, so the ordering depends only on
+        which genes are selected, as the cache key does.
+        """
+        genes = sorted(genes) if genes else sorted(self.default_genes())
+        key = ("oncoprint-order", self.store.key, tuple(genes))
+        return cached_compute(order_cache, key, self._ordering, genes)
+
+    def _ordering(self, genes: List[str]):
+        counts = self.store.frequency()[genes]
+        ordered = counts.sort_values(ascending=False, kind="stable").index.tolist()
+        mutated = self.store.dense(ordered).to_numpy(dtype=bool)
+        return ordered, memo_sort(mutated)
+
+    def render(self, genes: Optional[List[str]] = None, width: Optional[int] = None) -> Oncoprint:
+        ordered, order = self.ordering(genes)
+        mutated = self.store.dense(ordered).to_numpy(dtype=np.float32)[:, order]
+        n = mutated.shape[1]
+        columns = max((width or DEFAULT_WIDTH) // MIN_COLUMN_PX, 1)
+        factor = max(-(-n // columns), 1)
+        first = np.arange(0, n, factor)
+        last = np.minimum(first + factor, n) - 1
+        return Oncoprint(
+            genes=ordered,
+            frequency=mutated.mean(axis=1),
+            z=block_mean(mutated, 1, factor),
+            first=first,
+            last=last,
+            factor=factor,
+            n_samples=n,
+        )
+
+
+def oncoprint_figure(oncoprint: Oncoprint, sample_labels: Optional[np.ndarray] = None,
+                     title: str = "Oncoprint") -> go.Figure:
+    labels = [f"{g} ({f:.0%})" for g, f in zip(oncoprint.genes, oncoprint.frequency)]
+    if oncoprint.factor == 1 and sample_labels is not None:
+        x = sample_labels[oncoprint.first]
+        template = "%{y}<br>%{x}<br>mutated: %{z:.0f}<extra></extra>"
+    else:
+        # Columns are addressed by their first (1-based) sorted sample: no per-cell hover text.
+        x = oncoprint.first + 1
+        template = f"%{{y}}<br>{oncoprint.factor} samples from #%{{x}}<br>mutated: %{{z:.0%}}<extra></extra>"
+    fig = go.Figure(go.Heatmap(
+        z=oncoprint.z, x=x, y=labels,
+        colorscale=[[0, "#ffffff"], [1, "#d62728"]],
+        zmin=0, zmax=1,
+        xgap=0 if oncoprint.factor > 1 else 1, ygap=2,
+        hovertemplate=template,
+        showscale=oncoprint.factor > 1,
+        colorbar=dict(title="Fraction mutated"),
+    ))
+    level = f" ({oncoprint.factor} samples per column)" if oncoprint.factor > 1 else ""
+    fig.update_layout(
+        template="plotly_dark",
+        title=f"{title}: {len(oncoprint.genes)} genes x {oncoprint.n_samples:,} samples{level}",
+        height=max(300, 120 + ROW_HEIGHT * len(oncoprint.genes)),
+        xaxis=dict(title="Samples (memo-sorted)", showticklabels=False),
+        yaxis=dict(autorange="reversed"),
+    )
+    return fig
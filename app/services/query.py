@@ -0,0 +1,133 @@
+# app/services/query.py
+
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import List, Optional
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from app.services.delta_tables import to_dataset
+from app.services.storage import iter_batches, batches_to_rows, open_table
+
+
+@dataclass
+class ScanMetrics:
+    # Row group counts cover the files that were opened; skipped files are never read,
+    # so their footers are not fetched just to count them.
+    files_total: int = 0
+    files_scanned: int = 0
+    row_groups_total: int = 0
+    row_groups_scanned: int = 0
+    bytes_total: int = 0
+    bytes_scanned: int = 0
+    rows_returned: int = 0
+
+    def as_dict(self) -> dict:
+        d = asdict(self)
+        d["files_skipped"] = self.files_total - self.files_scanned
+        d["row_groups_skipped"] = self.row_groups_total - self.row_groups_scanned
+        d["bytes_skipped"] = self.bytes_total - self.bytes_scanned
+        return d
+
+
+@dataclass
+class QueryResult:
+    version: int
+    rows: List[dict]
+    metrics: ScanMetrics
+
+
+def build_filters(partition_columns: List[str], schema: pa.Schema, equals: dict,
+                  time_column: str, start: Optional[datetime], end: Optional[datetime]):
+    """Split the request into delta partition filters and a pyarrow expression.
+
+    Equality filters on partition columns become ``partitions`` tuples (whole
+    directories are dropped before any file is listed); everything else becomes a
+    dataset expression, which prunes files by their min/max statistics and row groups
+    by parquet footer statistics.
+    """
+    partitions, expr = [], None
+
+    def _and(e):
+        nonlocal expr
+        expr = e if expr is None else expr & e
+
+    for column, values in equals.items():
+        if not values:
+            continue
+        if column not in schema.names:
+            raise KeyError(column)
+        if column in partition_columns:
+            partitions.append((column, "in", list(values)))
+        else:
+            _and(ds.field(column).isin(list(values)))
+
+    if start is not None or end is not None:
+        if time_column not in schema.names:
+            raise KeyError(time_column)
+        if start is not None:
+            _and(ds.field(time_column) >= pa.scalar(start, type=schema.field(time_column).type))
+        if end is not None:
+            _and(ds.field(time_column) < pa.scalar(end, type=schema.field(time_column).type))
+    return partitions or None, expr
+
+
+def _row_group_bytes(rg, columns: Optional[set]) -> int:
+    total = 0
+    for i in range(rg.num_columns):
+        chunk = rg.column(i)
+        if columns is None or chunk.path_in_schema.split(".")[0] in columns:
+            total += chunk.total_compressed_size
+    return total
+
+
+def query_table(path: str, equals: dict, time_column: str = "timestamp",
+                start: Optional[datetime] = None, end: Optional[datetime] = None,
+                columns: Optional[List[str]] = None, limit: Optional[int] = None) -> QueryResult:
+    dt = open_table(path)
+    full = to_dataset(dt)
+    partition_columns = dt.metadata().partition_columns
+    partitions, expr = build_filters(partition_columns, full.schema, equals, time_column, start, end)
+    if columns:
+        missing = [c for c in columns if c not in full.schema.names]
+        if missing:
+            raise KeyError(", ".join(missing))
+
+    metrics = ScanMetrics()
+    actions = pa.table(dt.get_add_actions(flatten=True))
+    metrics.files_total = actions.num_rows
+    metrics.bytes_total = sum(actions.column("size_bytes").to_pylist())
+
+    dataset = to_dataset(dt, partitions) if partitions else full
+    # get_fragments(filter) evaluates the filter against each file's partition values and
+    # min/max statistics from the delta log; split_by_row_group does the same per row group.
+    wanted = set(columns) if columns else None
+    row_groups = []
+    for fragment in dataset.get_fragments(filter=expr) if expr is not None else dataset.get_fragments():
+        metrics.files_scanned += 1
+        fragment.ensure_complete_metadata()
+        metrics.row_groups_total += fragment.num_row_groups
+        row_groups.extend(fragment.split_by_row_group(filter=expr, schema=dataset.schema))
+
+    def consume(part) -> None:
+        metrics.row_groups_scanned += 1
+        metrics.bytes_scanned += _row_group_bytes(part.metadata.row_group(part.row_groups[0].id), wanted)
+
+    if limit is None:
+        # Every candidate row group is read: one scan over all of them.
+        for part in row_groups:
+            consume(part)
+        pruned = ds.FileSystemDataset(row_groups, dataset.schema, dataset.format, dataset.filesystem)
+        rows = batches_to_rows(iter_batches(pruned.scanner(columns=columns, filter=expr)))
+    else:
+        # Row group by row group, so scanning (and the read metrics) stop at the limit.
+        rows = []
+        for part in row_groups:
+            if len(rows) >= limit:
+                break
+            consume(part)
+            scanner = ds.Scanner.from_fragment(part, schema=dataset.schema, columns=columns, filter=expr)
+            rows.extend(batches_to_rows(iter_batches(scanner, limit=limit - len(rows))))
+    metrics.rows_returned = len(rows)
+    return QueryResult(dt.version(), rows, metrics)
@@ -0,0 +1,303 @@
+# app/services/replica.py
+
+import fcntl
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import unquote
+
+import fsspec
+import pyarrow as pa
+from deltalake import DeltaTable
+
+logger = logging.getLogger(__name__)
+
+_COMMIT = re.compile(r"^(\d{20})\.json$")
+
+
+class DeltaReplica:
+    """Local mirror of one Delta table, advanced commit by commit.
+
+    ``source`` is any fsspec URL (``abfss://...`` in production, ``file://...`` offline).
+    A fresh replica copies the log and the files of the current snapshot; afterwards each
+    sync copies only the data files added by new commits and drops the ones they remove.
+    Data files are always in place before the commit that references them is written,
+    so a reader of the local copy never sees a commit with missing files. Removed files
+    are kept for ``retention_seconds`` so readers on the previous snapshot can finish.
+    The copy is only :attr:`fresh` while syncs keep succeeding: after ``max_failures``
+    failures in a row, or ``max_lag_seconds`` without a successful sync, readers should
+    go to the source instead.
+    """
+
+    def __init__(self, source: str, local_dir: str, storage_options: Optional[dict] = None,
+                 retention_seconds: float = 300.0, max_lag_seconds: float = 300.0,
+                 max_failures: int = 3):
+        self.source = source
+        self.fs, self.root = fsspec.core.url_to_fs(source, **(storage_options or {}))
+        self.local_dir = Path(local_dir)
+        self.retention_seconds = retention_seconds
+        self.max_lag_seconds = max_lag_seconds
+        self.max_failures = max_failures
+        self.version = self._local_version()
+        self.last_sync: Optional[float] = None  # last successful sync, by this process
+        self.consecutive_failures = 0
+        self.files_copied = 0
+        self.files_removed = 0
+        self.bytes_copied = 0
+        self.pending_removals = 0
+        self._removes: Dict[str, tuple] = {}  # commit file -> (mtime, removed paths), parse cache
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.version is not None
+
+    @property
+    def fresh(self) -> bool:
+        return (self.ready and self.last_sync is not None
+                and time.time() - self.last_sync <= self.max_lag_seconds
+                and self.consecutive_failures < self.max_failures)
+
+    def _local_version(self) -> Optional[int]:
+        log_dir = self.local_dir / "_delta_log"
+        if not log_dir.is_dir():
+            return None
+        versions = [int(m.group(1)) for m in map(_COMMIT.match, os.listdir(log_dir)) if m]
+        return max(versions) if versions else None
+
+    def _remote_log(self) -> Dict[str, str]:
+        return {p.rsplit("/", 1)[-1]: p for p in self.fs.ls(f"{self.root}/_delta_log", detail=False)}
+
+    def _copy(self, relative: str, target_root: Optional[Path] = None) -> None:
+        target = (target_root or self.local_dir) / relative
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.tmp")
+        self.fs.get_file(f"{self.root}/{relative}", str(tmp))
+        os.replace(tmp, target)
+        self.files_copied += 1
+        self.bytes_copied += target.stat().st_size
+
+    def sync(self) -> int:
+        """Bring the replica up to the source's latest commit. Returns the number of commits applied."""
+        try:
+            applied = self._sync()
+        except Exception:
+            self.consecutive_failures += 1
+            raise
+        self.consecutive_failures = 0
+        self.last_sync = time.time()
+        return applied
+
+    def _sync(self) -> int:
+        with self._lock, self._file_lock():
+            # Another worker may have advanced the shared directory since our last look.
+            self.version = self._local_version()
+            remote_log = self._remote_log()
+            commits = sorted(int(m.group(1)) for m in map(_COMMIT.match, remote_log) if m)
+            if not commits:
+                raise FileNotFoundError(f"No Delta commits under {self.source}")
+
+            if self.version is None or (self.version + 1 not in commits and commits[-1] > self.version):
+                applied = self._bootstrap(remote_log)
+            else:
+                applied = 0
+                for version in (v for v in commits if v > self.version):
+                    self._apply_commit(version)
+                    applied += 1
+                self._copy_checkpoints(remote_log)
+
+            self._purge_removed()
+            return applied
+
+    def _apply_commit(self, version: int) -> None:
+        name = f"{version:020d}.json"
+        with self.fs.open(f"{self.root}/_delta_log/{name}", "rb") as f:
+            body = f.read()
+
+        for action in _actions(body):
+            if "add" in action:
+                self._copy(unquote(action["add"]["path"]))
+
+        log_dir = self.local_dir / "_delta_log"
+        log_dir.mkdir(parents=True, exist_ok=True)
+        tmp = log_dir / f".{name}.tmp"
+        tmp.write_bytes(body)
+        os.replace(tmp, log_dir / name)
+        self.version = version
+
+    def _copy_checkpoints(self, remote_log: Dict[str, str]) -> None:
+        log_dir = self.local_dir / "_delta_log"
+        names = sorted(n for n in remote_log if ".checkpoint" in n and not n.startswith("."))
+        for name in names:
+            if not (log_dir / name).exists():
+                self._copy(f"_delta_log/{name}")
+        # _last_checkpoint last, once the checkpoint it points at is in place
+        if "_last_checkpoint" in remote_log:
+            self._copy("_delta_log/_last_checkpoint")
+
+    def _bootstrap(self, remote_log: Dict[str, str]) -> int:
+        logger.info("Bootstrapping replica of %s into %s", self.source, self.local_dir)
+        staging = self.local_dir.with_name(self.local_dir.name + ".bootstrap")
+        shutil.rmtree(staging, ignore_errors=True)
+        for name in remote_log:
+            if _COMMIT.match(name) or ".checkpoint" in name or name == "_last_checkpoint":
+                self._copy(f"_delta_log/{name}", staging)
+
+        # The staged log alone is enough to list the live files of the current snapshot.
+        snapshot = DeltaTable(str(staging))
+        for path in pa.table(snapshot.get_add_actions(flatten=False)).column("path").to_pylist():
+            self._copy(unquote(path))
+
+        # Data files of the old snapshot stay for readers; _purge_removed drops them later.
+        old_log = self.local_dir / "_delta_log"
+        if old_log.exists():
+            shutil.rmtree(old_log)
+        os.replace(staging / "_delta_log", old_log)
+        shutil.rmtree(staging, ignore_errors=True)
+
+        previous, self.version = self.version, snapshot.version()
+        return self.version - (previous if previous is not None else -1)
+
+    def _purge_removed(self) -> None:
+        """Delete data files the local snapshot no longer references, ``retention_seconds``
+        after they left it.
+
+        Everything is derived from the shared directory, so any worker holding the file
+        lock can purge. A file left the snapshot when the local commit that removes it was
+        written; files without such a commit (left behind by a bootstrap) when the oldest
+        local commit was written, i.e. at the latest bootstrap.
+        """
+        log_dir = self.local_dir / "_delta_log"
+        commits = sorted(log_dir / n for n in os.listdir(log_dir) if _COMMIT.match(n))
+        if not commits:
+            return
+        removed_at: Dict[str, float] = {}
+        for commit in commits:
+            mtime, paths = self._removed_by(commit)
+            for path in paths:
+                removed_at.setdefault(path, mtime)
+        baseline = min(self._removed_by(c)[0] for c in commits)
+        live = {unquote(p) for p in pa.table(DeltaTable(str(self.local_dir)).get_add_actions(flatten=False))
+                .column("path").to_pylist()}
+
+        cutoff = time.time() - self.retention_seconds
+        pending = 0
+        for path in self._data_files():
+            if path in live:
+                continue
+            if removed_at.get(path, baseline) > cutoff:
+                pending += 1
+                continue
+            try:
+                (self.local_dir / path).unlink()
+                self.files_removed += 1
+            except FileNotFoundError:
+                pass
+        self.pending_removals = pending
+        names = {str(c) for c in commits}
+        self._removes = {k: v for k, v in self._removes.items() if k in names}
+
+    def _removed_by(self, commit: Path) -> tuple:
+        mtime = commit.stat().st_mtime
+        cached = self._removes.get(str(commit))
+        if cached is None or cached[0] != mtime:
+            paths = [unquote(a["remove"]["path"]) for a in _actions(commit.read_bytes()) if "remove" in a]
+            cached = self._removes[str(commit)] = (mtime, paths)
+        return cached
+
+    def _data_files(self) -> List[str]:
+        files = []
+        for root, dirs, names in os.walk(self.local_dir):
+            if Path(root) == self.local_dir:
+                dirs[:] = [d for d in dirs if d != "_delta_log"]
+            files.extend(Path(root, n).relative_to(self.local_dir).as_posix() for n in names)
+        return files
+
+    def _file_lock(self):
+        # Gunicorn workers share the replica directory; only one of them syncs at a time.
+        self.local_dir.mkdir(parents=True, exist_ok=True)
+        return _FileLock(self.local_dir.with_name(self.local_dir.name + ".lock"))
+
+    def stats(self) -> dict:
+        return {
+            "source": self.source,
+            "local_dir": str(self.local_dir),
+            "version": self.version,
+            "last_sync": self.last_sync,
+            "consecutive_failures": self.consecutive_failures,
+            "fresh": self.fresh,
+            "files_copied": self.files_copied,
+            "files_removed": self.files_removed,
+            "bytes_copied": self.bytes_copied,
+            "pending_removals": self.pending_removals,
+        }
+
+
+def _actions(body: bytes) -> List[dict]:
+    return [json.loads(line) for line in body.decode("utf-8").splitlines() if line.strip()]
+
+
+class _FileLock:
+    def __init__(self, path: Path):
+        self.path = path
+
+    def __enter__(self):
+        self._f = open(self.path, "w")
+        fcntl.flock(self._f, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        fcntl.flock(self._f, fcntl.LOCK_UN)
+        self._f.close()
+
+
+class ReplicaSyncer:
+    """Background thread that syncs every registered replica on an interval."""
+
+    def __init__(self, interval_seconds: float):
+        self.interval_seconds = interval_seconds
+        self.replicas: Dict[str, DeltaReplica] = {}
+        self.errors = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, key: str, replica: DeltaReplica) -> None:
+        self.replicas[key] = replica
+
+    def sync_all(self) -> None:
+        for key, replica in self.replicas.items():
+            try:
+                replica.sync()
+            except Exception:
+                self.errors += 1
+                logger.exception("Replica sync failed for %s", key)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.sync_all()
+            self._stop.wait(self.interval_seconds)
+
+    def start(self) -> None:
+        if self._thread is None and self.replicas:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="delta-replica-sync", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval_seconds)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "interval_seconds": self.interval_seconds,
+            "errors": self.errors,
+            "replicas": {k: r.stats() for k, r in self.replicas.items()},
+        }
@@ -8,6 +8,35 @@ class Settings(BaseSettings):
     PORT: str    
     BIOMRKTOOLS_SA_TOKEN: str | None = None
     BIOMRKTOOLS_ENV: str | None = None
+    DELTA_TABLE_REFRESH_SECONDS: float = 30.0
+    BLOCKING_IO_WORKERS: int = 8
+    REPLICA_DIR: str | None = None
+    REPLICA_SYNC_SECONDS: float = 60.0
+    REPLICA_RETENTION_SECONDS: float = 300.0
+    REPLICA_MAX_LAG_SECONDS: float = 300.0
+    REPLICA_MAX_FAILURES: int = 3
+    STORAGE_BACKEND: str = "azure"
+    LOCAL_STORAGE_ROOT: str = "./data"
+    STORAGE_POOL_MAX_IDLE_PER_HOST: int = 16
+    STORAGE_POOL_MAX_CONNECTIONS: int = 16
+    STORAGE_POOL_IDLE_TIMEOUT: str = "90s"
+    STORAGE_TIMEOUT: str = "30s"
+    STORAGE_CONNECT_TIMEOUT: str = "5s"
+    AZURE_TOKEN_REFRESH_MARGIN_SECONDS: float = 300.0
+    CACHE_DIR: str = "./cache"
+    CACHE_DISK_SIZE_LIMIT: int = 2 * 1024 ** 3
+    ANALYSIS_CACHE_TTL_SECONDS: float = 60.0
+    ANALYSIS_CACHE_STALE_SECONDS: float = 600.0
+    DASH_SERVERSIDE_STORE: bool = True
+    SERVERSIDE_STORE_MAX_ENTRIES: int = 500
+    SERVERSIDE_STORE_TTL_SECONDS: int = 3600
+    DASH_WORKER_POOL: bool = True
+    DASH_WORKERS: int = 8
+    DASH_MAX_QUEUE: int = 32
+    ANALYSIS_WORKERS: int = 4
+    SURVIVAL_SCAN_CHUNK: int = 1024
+    GENESET_DIR: str = "./app/data/genesets"
+    GSEA_PERMUTATIONS: int = 1000
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -0,0 +1,85 @@
+# app/services/stats.py
+
+import numpy as np
+from scipy.special import erfc, gammaincc, gammaln
+
+
+def chi2_sf(statistic, df: int = 1):
+    """Upper tail of the chi-square distribution (vectorized)."""
+    statistic = np.asarray(statistic, dtype=float)
+    if df == 1:
+        return erfc(np.sqrt(np.maximum(statistic, 0.0) / 2))
+    return gammaincc(df / 2, np.maximum(statistic, 0.0) / 2)
+
+
+def bh_fdr(p_values) -> np.ndarray:
+    """Benjamini-Hochberg adjusted p-values (q-values); NaNs stay NaN and are not counted."""
+    p = np.asarray(p_values, dtype=float)
+    q = np.full_like(p, np.nan)
+    valid = np.flatnonzero(~np.isnan(p))
+    m = valid.size
+    if m == 0:
+        return q
+    order = valid[np.argsort(p[valid], kind="stable")]
+    ranked = p[order] * m / np.arange(1, m + 1)
+    q[order] = np.minimum(np.minimum.accumulate(ranked[::-1])[::-1], 1.0)
+    return q
+
+
+def _log_choose(n, k):
+    return gammaln(n + 1) - gammaln(k + 1) - gammaln(n - k + 1)
+
+
+def hypergeom_logpmf(k, total, successes, draws) -> np.ndarray:
+    """log P(X = k) for X ~ Hypergeometric (vectorized, no support check)."""
+    return _log_choose(successes, k) + _log_choose(total - successes, draws - k) - _log_choose(total, draws)
+
+
+def _hypergeom_tail(k, total, successes, draws, upper: bool) -> np.ndarray:
+    """Sum of the hypergeometric pmf from ``k`` away from the mode (``upper``: k, k+1, ...).
+
+    Only valid where the pmf decreases in that direction, i.e. ``k`` is on the far side
+    of the mode. Terms follow the pmf ratio recurrence; an element drops out of the loop
+    once its terms stop contributing, which for tails takes a few standard deviations.
+    """
+    k, total, successes, draws = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (k, total, successes, draws)))
+    lo = np.maximum(0.0, draws - (total - successes))
+    hi = np.minimum(successes, draws)
+    inside = (k >= lo) & (k <= hi)
+    kk = np.where(inside, k, lo)
+    with np.errstate(invalid="ignore"):
+        term = np.where(inside, np.exp(hypergeom_logpmf(kk, total, successes, draws)), 0.0).ravel()
+    tail = term.copy()
+    x = kk.ravel().copy()
+    n, m, d = successes.ravel(), total.ravel(), draws.ravel()
+    active = np.flatnonzero(term > 0)
+    while active.size:
+        xa, na, ma, da = x[active], n[active], m[active], d[active]
+        if upper:
+            ratio = (na - xa) * (da - xa) / ((xa + 1) * (ma - na - da + xa + 1))
+            x[active] += 1
+        else:
+            ratio = xa * (ma - na - da + xa) / ((na - xa + 1) * (da - xa + 1))
+            x[active] -= 1
+        term[active] *= ratio
+        tail[active] += term[active]
+        active = active[term[active] > tail[active] * 1e-17]
+    return tail.reshape(k.shape)
+
+
+def hypergeom_sf(k, total, successes, draws) -> np.ndarray:
+    """P(X >= k) for X ~ Hypergeometric (vectorized); one-sided Fisher's exact test for enrichment."""
+    k, total, successes, draws = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (k, total, successes, draws)))
+    mode = np.floor((draws + 1) * (successes + 1) / (total + 2))
+    far = k > mode
+    p = np.empty(k.shape)
+    p[far] = _hypergeom_tail(k[far], total[far], successes[far], draws[far], upper=True)
+    near = ~far
+    p[near] = 1.0 - _hypergeom_tail(k[near] - 1, total[near], successes[near], draws[near], upper=False)
+    return np.clip(p, 0.0, 1.0)
+
+
+def hypergeom_cdf(k, total, successes, draws) -> np.ndarray:
+    """P(X <= k) for X ~ Hypergeometric (vectorized); one-sided Fisher's exact test for depletion."""
+    k, total, successes, draws = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (k, total, successes, draws)))
+    return hypergeom_sf(draws - k, total, total - successes, draws)
@@ -1,60 +1,213 @@
+import base64
 import json
 import os
-from typing import Any, List
-import fsspec
-from azure.identity import DefaultAzureCredential
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Iterable, Iterator, List
 from deltalake import DeltaTable
-import pandas as pd
 from .settings import settings
 from app.services import app_config
-# Then read into pandas
+from app.services.delta_tables import get_table, to_dataset
+from app.services.replica import DeltaReplica, ReplicaSyncer
+from app.services.storage_clients import clients
+import pyarrow as pa
 import pyarrow.compute as pc
 import pyarrow.dataset as ds
 
-_account = app_config.BASE_PATHS.get("storage_account") 
-_container = app_config.BASE_PATHS.get("silver_container") 
 _table_path = app_config.DATA_PATHS.get("adeg") 
 
-token = settings.BIOMRKTOOLS_SA_TOKEN
+def _fs():
+    return clients.filesystem()
 
-# Use managed identity / dev creds automatically (works locally with Azure CLI login,
-# and in Azure Container Apps with system-assigned identity).
-_cred = DefaultAzureCredential(exclude_interactive_browser_credential=False)
+def remote_uri(path: str) -> str:
+    return clients.table_uri(path)
 
-def _fs():
-    return fsspec.filesystem(
-        "abfs",
-        account_name=_account,
-        credential=_cred
-    )
-
-def read_delta_head(path: str = _table_path, limit: int = 20) -> List[dict]:
-    # Acquire a bearer token for Delta-RS object store:
-    #token = _cred.get_token("https://storage.azure.com/.default").token
-    
-    uri = f"abfss://{_container}@{_account}.dfs.core.windows.net/{path}"
-
-    df = DeltaTable(
-        table_uri=uri,
-        storage_options={
-            "azure_storage_account_name": _account,
-            "azure_storage_sas_token": token
-        }
-    ).to_pyarrow_table(
-        partitions=[("cancer_code", "=", "BRCA")],  # <- specify partition key + value
-        columns=None  # or a list of specific columns
-    ).to_pandas()
-
-    
-    df['log_summary'] = df['log_summary'].astype(str)
-    df['llm_summary'] = df['llm_summary'].astype(str)
-    df['config'] = df['config'].astype(str)
-
-    print(df)
-    print(df["config"])
-
-
-    # Ensure all entries in top_genes (ARRAY<STRING>) are plain lists
-    df['top_genes'] = df['top_genes'].apply(lambda x: list(x) if isinstance(x, (list, tuple)) else [])
-
-    return df.to_dict(orient="records")[0] 
+
+# Local read-replicas of the silver tables, kept in sync from the transaction log.
+replica_syncer = ReplicaSyncer(interval_seconds=settings.REPLICA_SYNC_SECONDS)
+if settings.REPLICA_DIR:
+    for _path in app_config.DATA_PATHS.values():
+        replica_syncer.add(_path, DeltaReplica(
+            clients.source_url(_path),
+            os.path.join(settings.REPLICA_DIR, _path),
+            storage_options=clients.fsspec_options(),
+            retention_seconds=settings.REPLICA_RETENTION_SECONDS,
+            max_lag_seconds=settings.REPLICA_MAX_LAG_SECONDS,
+            max_failures=settings.REPLICA_MAX_FAILURES,
+        ))
+
+
+def table_uri(path: str) -> str:
+    # A replica that has fallen behind (or keeps failing to sync) is bypassed until it recovers.
+    replica = replica_syncer.replicas.get(path)
+    if replica is not None and replica.fresh:
+        return str(replica.local_dir)
+    return remote_uri(path)
+
+# Columns served as plain strings / lists regardless of how they were written.
+STRING_COLUMNS = ["log_summary", "llm_summary", "config"]
+LIST_COLUMNS = ["top_genes"]
+DEFAULT_PARTITIONS = [("cancer_code", "=", "BRCA")]
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PAGE_BATCH_SIZE = 1024
+
+
+def open_table(path: str = _table_path, version: int | None = None) -> DeltaTable:
+    return get_table(table_uri(path), clients.delta_storage_options(), version=version)
+
+
+def open_dataset(path: str = _table_path, partitions=DEFAULT_PARTITIONS, version: int | None = None):
+    dt = open_table(path, version)
+    return to_dataset(dt, partitions), dt.version()
+
+
+def scan_delta(path: str = _table_path, partitions=DEFAULT_PARTITIONS, columns: List[str] | None = None,
+               filter: ds.Expression | None = None) -> ds.Scanner:
+    dataset, _ = open_dataset(path, partitions)
+    return dataset.scanner(columns=columns, filter=filter)
+
+
+@dataclass
+class Cursor:
+    """Position in a table snapshot: (delta version, data file index, row within file)."""
+    version: int
+    fragment: int = 0
+    row: int = 0
+
+    def encode(self) -> str:
+        raw = json.dumps([self.version, self.fragment, self.row]).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    @classmethod
+    def decode(cls, token: str) -> "Cursor":
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            version, fragment, row = json.loads(raw)
+            return cls(int(version), int(fragment), int(row))
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Invalid cursor: {token!r}") from e
+
+
+def _skip_rows(fragment: ds.Fragment, rows: int):
+    """Drop whole leading row groups covered by ``rows``; returns (fragment, rows still to skip)."""
+    if rows <= 0 or not isinstance(fragment, ds.ParquetFileFragment):
+        return fragment, rows
+    fragment.ensure_complete_metadata()
+    keep, skipped = [], 0
+    for rg in fragment.row_groups:
+        if not keep and skipped + rg.num_rows <= rows:
+            skipped += rg.num_rows
+        else:
+            keep.append(rg.id)
+    if not skipped:
+        return fragment, rows
+    return fragment.subset(row_group_ids=keep), rows - skipped
+
+
+def scan_pages(path: str = _table_path, cursor: Cursor | None = None, limit: int | None = None,
+               partitions=DEFAULT_PARTITIONS, columns: List[str] | None = None) -> Iterator[tuple]:
+    """Yield ``(batch, cursor_after_batch)`` from ``cursor`` until ``limit`` rows or the end of the snapshot.
+
+    Data files are visited in path order so a cursor stays valid for its pinned version;
+    earlier files are never opened and leading row groups of the current one are skipped
+    from parquet metadata alone. Memory stays bounded by the scanner batch size.
+    """
+    dataset, version = open_dataset(path, partitions, version=cursor.version if cursor else None)
+    fragments = sorted(dataset.get_fragments(), key=lambda f: f.path)
+    start = cursor or Cursor(version)
+
+    remaining = limit
+    for index in range(start.fragment, len(fragments)):
+        offset = start.row if index == start.fragment else 0
+        fragment, skip = _skip_rows(fragments[index], offset)
+        scanner = ds.Scanner.from_fragment(fragment, schema=dataset.schema, columns=columns,
+                                           batch_size=PAGE_BATCH_SIZE)
+        for batch in scanner.to_batches():
+            if skip >= batch.num_rows:
+                skip -= batch.num_rows
+                continue
+            batch = batch.slice(skip, remaining)
+            skip = 0
+            offset += batch.num_rows
+            if batch.num_rows:
+                yield _normalize_batch(batch), Cursor(version, index, offset)
+            if remaining is not None:
+                remaining -= batch.num_rows
+                if remaining <= 0:
+                    return
+
+
+def read_page(path: str = _table_path, cursor: Cursor | None = None, limit: int = 20, **kwargs):
+    """Up to ``limit`` rows as normalized batches, plus the cursor of the next page (None at the end)."""
+    batches, after = [], None
+    for batch, after in scan_pages(path, cursor, limit=limit, **kwargs):
+        batches.append(batch)
+    if sum(b.num_rows for b in batches) < limit:
+        after = None
+    return batches, after
+
+
+def _normalize_batch(batch: pa.RecordBatch) -> pa.RecordBatch:
+    columns = []
+    for name, col in zip(batch.schema.names, batch.columns):
+        if name in STRING_COLUMNS and not pa.types.is_string(col.type):
+            col = pc.cast(col, pa.string())
+        elif name in LIST_COLUMNS and pa.types.is_list(col.type):
+            # Ensure all entries in top_genes (ARRAY<STRING>) are plain lists
+            col = col.fill_null(pa.scalar([], type=col.type))
+        columns.append(col)
+    return pa.RecordBatch.from_arrays(columns, names=batch.schema.names)
+
+
+def iter_batches(scanner: ds.Scanner, limit: int | None = None) -> Iterator[pa.RecordBatch]:
+    """Normalized record batches from ``scanner``, stopping after ``limit`` rows."""
+    remaining = limit
+    for batch in scanner.to_batches():
+        if remaining is not None:
+            if remaining <= 0:
+                return
+            batch = batch.slice(0, remaining)
+            remaining -= batch.num_rows
+        if batch.num_rows:
+            yield _normalize_batch(batch)
+
+
+def _json_default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    return str(value)
+
+
+def to_json(value: Any) -> bytes:
+    return json.dumps(value, default=_json_default, separators=(",", ":")).encode("utf-8")
+
+
+def batches_to_rows(batches: Iterable[pa.RecordBatch]) -> List[dict]:
+    rows = []
+    for batch in batches:
+        rows.extend(batch.to_pylist())
+    return rows
+
+
+def batches_to_ipc(batches: Iterable[pa.RecordBatch], schema: pa.Schema) -> bytes:
+    sink = pa.BufferOutputStream()
+    writer = None
+    for batch in batches:
+        if writer is None:
+            writer = pa.ipc.new_stream(sink, batch.schema)
+        writer.write_batch(batch)
+    if writer is None:
+        writer = pa.ipc.new_stream(sink, schema)
+    writer.close()
+    return sink.getvalue().to_pybytes()
+
+
+def read_delta_head(path: str = _table_path, limit: int = 20, partitions=DEFAULT_PARTITIONS) -> dict:
+    rows = batches_to_rows(iter_batches(scan_delta(path, partitions), limit=1))
+    return rows[0] if rows else {}
@@ -0,0 +1,171 @@
+# app/services/storage_clients.py
+
+import logging
+import os
+import threading
+import time
+from typing import Iterable, Optional
+
+import fsspec
+
+from app.services import app_config
+from app.services.settings import settings
+
+logger = logging.getLogger(__name__)
+
+AZURE_STORAGE_SCOPE = "https://storage.azure.com/.default"
+
+
+class AzureTokenProvider:
+    """One DefaultAzureCredential per process with a cached, proactively refreshed token.
+
+    The credential is created lazily (not at import) and the access token is renewed
+    ``refresh_margin`` seconds before it expires, either on demand or by a background
+    thread started at worker boot, so requests never pay for a token round trip.
+    """
+
+    def __init__(self, refresh_margin: float):
+        self.refresh_margin = refresh_margin
+        self._credential = None
+        self._token = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.refreshes = 0
+
+    @property
+    def credential(self):
+        if self._credential is None:
+            with self._lock:
+                if self._credential is None:
+                    # Use managed identity / dev creds automatically (works locally with Azure CLI login,
+                    # and in Azure Container Apps with system-assigned identity).
+                    from azure.identity import DefaultAzureCredential
+                    self._credential = DefaultAzureCredential(exclude_interactive_browser_credential=False)
+        return self._credential
+
+    def token(self) -> str:
+        token = self._token
+        if token is None or token.expires_on - time.time() < self.refresh_margin:
+            with self._lock:
+                token = self._token
+                if token is None or token.expires_on - time.time() < self.refresh_margin:
+                    token = self._token = self.credential.get_token(AZURE_STORAGE_SCOPE)
+                    self.refreshes += 1
+        return token.token
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.token()
+                wait = self._token.expires_on - time.time() - self.refresh_margin
+            except Exception:
+                logger.exception("Azure token refresh failed")
+                wait = 30
+            self._stop.wait(max(wait, 5))
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="azure-token-refresh", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread = None
+
+
+class StorageClients:
+    """The single place that knows how to reach storage.
+
+    ``STORAGE_BACKEND=azure`` talks to ADLS Gen2 with the SAS token when one is
+    configured and a cached AAD token otherwise. ``STORAGE_BACKEND=local`` reads the same
+    container/path layout from ``LOCAL_STORAGE_ROOT`` on disk, which is what the app and
+    its benchmarks use offline (point it at /dev/shm for an in-memory store).
+    """
+
+    def __init__(self, backend: str):
+        if backend not in ("azure", "local"):
+            raise ValueError(f"Unknown STORAGE_BACKEND '{backend}' (expected 'azure' or 'local')")
+        self.backend = backend
+        self.account = app_config.BASE_PATHS.get("storage_account")
+        self.sas_token = settings.BIOMRKTOOLS_SA_TOKEN
+        self.local_root = os.path.abspath(settings.LOCAL_STORAGE_ROOT)
+        self.tokens = AzureTokenProvider(refresh_margin=settings.AZURE_TOKEN_REFRESH_MARGIN_SECONDS)
+        self._fs = None
+
+    def table_uri(self, path: str, container: Optional[str] = None) -> str:
+        container = container or app_config.BASE_PATHS.get("silver_container")
+        if self.backend == "local":
+            return os.path.join(self.local_root, container, path)
+        return f"abfss://{container}@{self.account}.dfs.core.windows.net/{path}"
+
+    def delta_storage_options(self) -> Optional[dict]:
+        """delta-rs (object_store) options, including HTTP connection pool limits."""
+        if self.backend == "local":
+            return None
+        options = {
+            "azure_storage_account_name": self.account,
+            "pool_max_idle_per_host": str(settings.STORAGE_POOL_MAX_IDLE_PER_HOST),
+            "pool_idle_timeout": settings.STORAGE_POOL_IDLE_TIMEOUT,
+            "timeout": settings.STORAGE_TIMEOUT,
+            "connect_timeout": settings.STORAGE_CONNECT_TIMEOUT,
+        }
+        if self.sas_token:
+            options["azure_storage_sas_token"] = self.sas_token
+        else:
+            options["bearer_token"] = self.tokens.token()
+        return options
+
+    def fsspec_options(self) -> dict:
+        if self.backend == "local":
+            return {}
+        options = {"account_name": self.account, "max_concurrency": settings.STORAGE_POOL_MAX_CONNECTIONS}
+        if self.sas_token:
+            options["sas_token"] = self.sas_token
+        else:
+            options["credential"] = self.tokens.credential
+        return options
+
+    def source_url(self, path: str, container: Optional[str] = None) -> str:
+        """fsspec URL of a table (used by the replica syncer)."""
+        uri = self.table_uri(path, container)
+        return f"file://{uri}" if self.backend == "local" else uri
+
+    def filesystem(self) -> fsspec.AbstractFileSystem:
+        if self._fs is None:
+            if self.backend == "local":
+                self._fs = fsspec.filesystem("file")
+            else:
+                self._fs = fsspec.filesystem("abfs", **self.fsspec_options())
+        return self._fs
+
+    def fs_path(self, path: str, container: Optional[str] = None) -> str:
+        """Path of ``path`` inside ``container`` as understood by :meth:`filesystem`."""
+        container = container or app_config.BASE_PATHS.get("silver_container")
+        if self.backend == "local":
+            return os.path.join(self.local_root, container, path)
+        return f"{container}/{path}"
+
+    def warm_up(self, paths: Iterable[str]) -> None:
+        """Pay credential, connection and log-replay costs at worker boot instead of on the first request."""
+        from app.services.delta_tables import get_table
+
+        if self.backend == "azure" and not self.sas_token:
+            self.tokens.start()
+        self.filesystem()
+        for path in paths:
+            try:
+                get_table(self.table_uri(path), self.delta_storage_options())
+            except Exception:
+                logger.exception("Could not pre-open table %s", path)
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "auth": "local" if self.backend == "local" else ("sas" if self.sas_token else "aad"),
+            "token_refreshes": self.tokens.refreshes,
+        }
+
+
+clients = StorageClients(settings.STORAGE_BACKEND)
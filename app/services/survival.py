@@ -0,0 +1,123 @@
+# app/services/survival.py
+
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtri
+
+from app.services.cache import caches
+from app.services.hashing import fingerprint
+from app.services.stats import chi2_sf
+
+result_cache = caches["analysis"]
+
+
+@dataclass
+class SurvivalTable:
+    """Per-group counts on the pooled grid of distinct observed times."""
+    groups: List[str]
+    times: np.ndarray     # (T,) sorted distinct times
+    events: np.ndarray    # (G, T) deaths at each time
+    at_risk: np.ndarray   # (G, T) subjects still at risk just before each time
+
+
+@dataclass
+class KaplanMeier:
+    groups: List[str]
+    times: np.ndarray
+    survival: np.ndarray  # (G, T) S(t) right after each time
+    lower: np.ndarray     # (G, T) exponential Greenwood band
+    upper: np.ndarray
+    at_risk: np.ndarray
+
+
+@dataclass
+class LogRank:
+    statistic: float
+    df: int
+    p_value: float
+    observed: np.ndarray  # (G,)
+    expected: np.ndarray  # (G,)
+
+
+def survival_table(time, event, groups) -> SurvivalTable:
+    """Count deaths and subjects at risk for every group at every distinct time, in one pass."""
+    time = np.asarray(time, dtype=float)
+    event = np.asarray(event).astype(bool)
+    labels, g = np.unique(np.asarray(groups), return_inverse=True)
+    times, t = np.unique(time, return_inverse=True)
+    n_groups, n_times = len(labels), len(times)
+
+    cell = g * n_times + t
+    size = n_groups * n_times
+    removed = np.bincount(cell, minlength=size).reshape(n_groups, n_times)
+    events = np.bincount(cell, weights=event, minlength=size).reshape(n_groups, n_times)
+    # at risk at t_j = everyone whose time is >= t_j
+    at_risk = removed[:, ::-1].cumsum(axis=1)[:, ::-1]
+    return SurvivalTable([str(x) for x in labels], times, events, at_risk.astype(float))
+
+
+def kaplan_meier(table: SurvivalTable, alpha: float = 0.05) -> KaplanMeier:
+    """KM curves for all groups with exponential ("log-log") Greenwood confidence bands."""
+    d, n = table.events, table.at_risk
+    with np.errstate(divide="ignore", invalid="ignore"):
+        hazard = np.where(n > 0, d / n, 0.0)
+        survival = np.cumprod(1.0 - hazard, axis=1)
+        greenwood = np.cumsum(np.where(n > d, d / (n * (n - d)), 0.0), axis=1)
+        z = ndtri(1 - alpha / 2)
+        log_s = np.log(survival)
+        spread = z * np.sqrt(greenwood) / np.abs(log_s)
+        lower = np.exp(-np.exp(np.log(-log_s) + spread))
+        upper = np.exp(-np.exp(np.log(-log_s) - spread))
+    # Before the first death S = 1 and the band collapses onto it.
+    lower = np.where(greenwood > 0, lower, survival)
+    upper = np.where(greenwood > 0, upper, survival)
+    return KaplanMeier(table.groups, table.times, survival, np.nan_to_num(lower), np.nan_to_num(upper, nan=1.0), n)
+
+
+def logrank(table: SurvivalTable) -> LogRank:
+    """k-group log-rank test (chi-square with k - 1 degrees of freedom)."""
+    d, n = table.events, table.at_risk
+    d_tot, n_tot = d.sum(axis=0), n.sum(axis=0)
+    valid = n_tot > 0
+    d, n, d_tot, n_tot = d[:, valid], n[:, valid], d_tot[valid], n_tot[valid]
+
+    share = n / n_tot
+    observed = d.sum(axis=1)
+    expected = (share * d_tot).sum(axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weight = np.where(n_tot > 1, d_tot * (n_tot - d_tot) / (n_tot - 1), 0.0)
+    # V_gh = sum_t w_t * share_g (delta_gh - share_h)
+    variance = np.einsum("t,gt->g", weight, share)
+    covariance = np.diag(variance) - np.einsum("t,gt,ht->gh", weight, share, share)
+
+    k = len(observed) - 1
+    if k < 1:
+        return LogRank(0.0, 0, 1.0, observed, expected)
+    diff = (observed - expected)[:k]
+    statistic = float(diff @ np.linalg.pinv(covariance[:k, :k]) @ diff)
+    return LogRank(statistic, k, float(chi2_sf(statistic, k)), observed, expected)
+
+
+@dataclass
+class SurvivalAnalysis:
+    km: KaplanMeier
+    logrank: LogRank
+
+
+def analyze(df: pd.DataFrame, time: str = "time", event: str = "event", group: str = "group",
+            alpha: float = 0.05) -> SurvivalAnalysis:
+    """KM curves and log-rank test for one cohort/grouping, cached in the ``analysis`` namespace.
+
+    The cache key is a fingerprint of the cohort's time/event columns and the grouping.
+    """
+    key = ("survival", fingerprint(df[[time, event, group]]), alpha)
+    result = result_cache.get(key)
+    if result is None:
+        table = survival_table(df[time], df[event], df[group])
+        result = SurvivalAnalysis(kaplan_meier(table, alpha), logrank(table))
+        result_cache.set(key, result)
+    return result
@@ -0,0 +1,105 @@
+# app/services/survival_scan.py
+
+import logging
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from app.services.cache import caches
+from app.services.cohorts import Cohort
+from app.services.concurrency import cached_compute, processes
+from app.services.settings import settings
+from app.services.stats import bh_fdr, chi2_sf
+
+logger = logging.getLogger(__name__)
+
+METHODS = ("median", "optimal")
+# Candidate cutpoints for method="optimal" (quantiles of each gene's expression).
+OPTIMAL_QUANTILES = np.linspace(0.2, 0.8, 13)
+
+result_cache = caches["analysis"]
+
+
+def _logrank_splits(high: np.ndarray, event: np.ndarray, starts: np.ndarray,
+                    d_tot: np.ndarray, n_tot: np.ndarray):
+    """Two-group log-rank for many splits of the same (time-sorted) samples at once.
+
+    ``high`` is (splits x samples), 1 where a sample is in the "high" group. Returns
+    the chi-square statistic and the hazard ratio estimate (O/E high over O/E low).
+    """
+    removed = np.add.reduceat(high, starts, axis=1)
+    deaths = np.add.reduceat(high * event, starts, axis=1)
+    at_risk = removed[:, ::-1].cumsum(axis=1)[:, ::-1]
+
+    share = at_risk / n_tot
+    observed = deaths.sum(axis=1)
+    expected = share @ d_tot
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weight = np.where(n_tot > 1, d_tot * (n_tot - d_tot) / (n_tot - 1), 0.0)
+        variance = (share * (1 - share)) @ weight
+        statistic = (observed - expected) ** 2 / variance
+        total = d_tot.sum()
+        hazard_ratio = (observed / expected) / ((total - observed) / (total - expected))
+    return statistic, hazard_ratio
+
+
+def _scan_chunk(values: np.ndarray, event: np.ndarray, starts: np.ndarray,
+                d_tot: np.ndarray, n_tot: np.ndarray, method: str) -> np.ndarray:
+    """(genes x 5) array of cutpoint, n_high, statistic, p_value, hazard_ratio."""
+    if method == "median":
+        candidates = np.median(values, axis=1)[None, :]
+    else:
+        candidates = np.quantile(values, OPTIMAL_QUANTILES, axis=1)
+
+    best = np.full((values.shape[0], 4), np.nan)
+    best[:, 2] = -np.inf
+    for cut in candidates:
+        high = (values > cut[:, None]).astype(np.float64)
+        statistic, hazard_ratio = _logrank_splits(high, event, starts, d_tot, n_tot)
+        better = np.nan_to_num(statistic, nan=-np.inf) > best[:, 2]
+        best[better] = np.column_stack([cut, high.sum(axis=1), statistic, hazard_ratio])[better]
+    statistic = np.where(np.isfinite(best[:, 2]), best[:, 2], np.nan)
+    return np.column_stack([best[:, 0], best[:, 1], statistic, chi2_sf(statistic), best[:, 3]])
+
+
+def run_scan(cohort: Cohort, method: str = "median", chunk_size: Optional[int] = None) -> pd.DataFrame:
+    """Split the cohort at every gene's cutpoint and rank genes by log-rank p-value.
+
+    Samples are sorted by time once; each chunk of genes is then scored with
+    :func:`_logrank_splits` in a few matrix operations, and chunks run in parallel on the
+    shared analysis process pool. ``method="optimal"`` keeps the best of several quantile cutpoints per
+    gene - its p-values are the minimum over those candidates and therefore optimistic;
+    rank by them, don't read them as calibrated. q-values are Benjamini-Hochberg.
+    Genes no cutpoint splits into two non-empty groups (e.g. constant expression) are
+    kept with ``n_high`` <NA> and NaN statistics, after every tested gene.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method '{method}' (expected one of {METHODS})")
+    chunk_size = chunk_size or settings.SURVIVAL_SCAN_CHUNK
+    logger.info("Running %s survival scan for cohort %s (%d genes)", method, cohort.name, len(cohort.expression))
+
+    clinical = cohort.clinical
+    order = np.argsort(clinical[cohort.time].to_numpy(dtype=float), kind="stable")
+    time = clinical[cohort.time].to_numpy(dtype=float)[order]
+    event = clinical[cohort.event].to_numpy(dtype=float)[order]
+    starts = np.r_[0, np.flatnonzero(np.diff(time)) + 1]
+    d_tot = np.add.reduceat(event, starts)
+    n_tot = np.add.reduceat(np.ones_like(time), starts)[::-1].cumsum()[::-1]
+
+    values = cohort.expression.to_numpy(dtype=np.float32)[:, order]
+    args = (event, starts, d_tot, n_tot, method)
+    jobs = [(values[i:i + chunk_size], *args) for i in range(0, values.shape[0], chunk_size)]
+    parts = processes.map(_scan_chunk, jobs)
+
+    scores = np.concatenate(parts)
+    result = pd.DataFrame(scores, columns=["cutpoint", "n_high", "statistic", "p_value", "hazard_ratio"])
+    result.insert(0, "gene", cohort.expression.index.astype(str))
+    result["n_high"] = result["n_high"].astype("Int64")
+    result["q_value"] = bh_fdr(result["p_value"].to_numpy())
+    return result.sort_values("p_value", kind="stable", na_position="last").reset_index(drop=True)
+
+
+def survival_scan(cohort: Cohort, method: str = "median") -> pd.DataFrame:
+    """:func:`run_scan`, cached per cohort (data fingerprint) and method."""
+    return cached_compute(result_cache, ("survival-scan", cohort.key, method), run_scan, cohort, method)
@@ -0,0 +1,108 @@
+# app/services/table_query.py
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from app.services.cache import caches
+from app.services.hashing import fingerprint
+
+# DataTable filter operators, longest spellings first so "ge" is not read as "eq".
+OPERATORS = [
+    ("ge ", ">="), ("le ", "<="), ("lt ", "<"), ("gt ", ">"),
+    ("ne ", "!="), ("eq ", "="), ("contains ",), ("datestartswith ",),
+]
+_COMPARE = {
+    "ge": pc.greater_equal, "le": pc.less_equal, "lt": pc.less, "gt": pc.greater,
+    "ne": pc.not_equal, "eq": pc.equal,
+}
+
+index_cache = caches["tables"]
+
+
+def split_filter_part(part: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """``'{log2FC} > 2'`` -> ``("log2FC", "gt", "2")`` (DataTable ``filter_query`` syntax)."""
+    for spellings in OPERATORS:
+        for spelling in spellings:
+            if spelling not in part:
+                continue
+            name_part, value_part = part.split(spelling, 1)
+            name = name_part[name_part.find("{") + 1:name_part.rfind("}")]
+            value = value_part.strip()
+            if value and value[0] == value[-1] and value[0] in ("'", '"', "`"):
+                value = value[1:-1].replace("\\" + value[0], value[0])
+            return name, spellings[0].strip(), value
+    return None, None, None
+
+
+def _coerce(value: str, type_: pa.DataType):
+    if pa.types.is_boolean(type_):
+        return value.strip().lower() in ("true", "1", "yes")
+    if pa.types.is_integer(type_) or pa.types.is_floating(type_):
+        return float(value)
+    return value
+
+
+class ArrowTableQuery:
+    """Paging, sorting and filtering for a DataTable in ``custom`` mode, on an Arrow table.
+
+    Sort orders are computed once per ``sort_by`` with ``pc.sort_indices`` and filter
+    masks once per ``filter_query``; both are kept in the ``tables`` cache namespace, so
+    a page change or a re-sort of an already seen column is an index slice + ``take``.
+    """
+
+    def __init__(self, table: pa.Table):
+        self.table = table
+        self.key = fingerprint(table.to_pandas())
+
+    def _cached(self, kind: str, spec, compute):
+        key = (self.key, kind, spec)
+        value = index_cache.get(key)
+        if value is None:
+            value = compute()
+            index_cache.set(key, value)
+        return value
+
+    def sort_indices(self, sort_by: List[dict]) -> np.ndarray:
+        keys = tuple((s["column_id"], "ascending" if s["direction"] == "asc" else "descending") for s in sort_by)
+        return self._cached("sort", keys, lambda: pc.sort_indices(self.table, sort_keys=list(keys)).to_numpy())
+
+    def filter_mask(self, filter_query: str) -> np.ndarray:
+        def compute():
+            mask = None
+            for part in filter_query.split(" && "):
+                name, op, value = split_filter_part(part)
+                if name not in self.table.column_names:
+                    continue
+                column = self.table.column(name)
+                if op in _COMPARE:
+                    try:
+                        operand = _coerce(value, column.type)
+                    except ValueError:
+                        continue  # e.g. text typed into a numeric column's filter
+                    cond = _COMPARE[op](column, operand)
+                elif op == "contains":
+                    cond = pc.match_substring(pc.cast(column, pa.string()), value)
+                else:  # datestartswith
+                    cond = pc.starts_with(pc.cast(column, pa.string()), value)
+                mask = cond if mask is None else pc.and_(mask, cond)
+            if mask is None:
+                return np.ones(self.table.num_rows, dtype=bool)
+            return pc.fill_null(mask, False).to_numpy(zero_copy_only=False)
+        return self._cached("filter", filter_query, compute)
+
+    def ordered_indices(self, filter_query: Optional[str], sort_by: Optional[List[dict]]) -> np.ndarray:
+        order = self.sort_indices(sort_by) if sort_by else np.arange(self.table.num_rows)
+        if filter_query:
+            order = order[self.filter_mask(filter_query)[order]]
+        return order
+
+    def page(self, page_current: int, page_size: int, filter_query: Optional[str] = None,
+             sort_by: Optional[List[dict]] = None) -> Tuple[List[dict], int]:
+        """Rows of one page and the number of pages after filtering."""
+        order = self.ordered_indices(filter_query, sort_by)
+        start = (page_current or 0) * page_size
+        rows = self.table.take(pa.array(order[start:start + page_size])).to_pylist()
+        return rows, max(-(-len(order) // page_size), 1)
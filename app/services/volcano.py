@@ -0,0 +1,92 @@
+# app/services/volcano.py
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+# Above this many points the plot is drawn with WebGL (Scattergl) instead of SVG.
+WEBGL_THRESHOLD = 2000
+# Above this many points the non-significant cloud is decimated server-side.
+DECIMATE_THRESHOLD = 5000
+GRID_SIZE = 256
+MAX_PER_CELL = 2
+
+COLORS = {True: "crimson", False: "gray"}
+
+
+def decimate(x: np.ndarray, y: np.ndarray, keep: np.ndarray,
+             grid_size: int = GRID_SIZE, max_per_cell: int = MAX_PER_CELL) -> np.ndarray:
+    """Boolean mask of the points to draw.
+
+    Points are binned on a ``grid_size`` x ``grid_size`` grid over the data range. Every
+    point in ``keep`` (the significant genes) is drawn; of the rest at most
+    ``max_per_cell`` per cell are. Cells with few points - the outliers at the edges of
+    the cloud - are therefore drawn in full, and only the dense core is thinned.
+    """
+    mask = keep.copy()
+    finite = np.isfinite(x) & np.isfinite(y)
+    candidates = np.flatnonzero(~mask & finite)
+    if candidates.size == 0:
+        return mask
+
+    def _bin(v):
+        lo, hi = np.min(v[finite]), np.max(v[finite])
+        scale = (grid_size - 1) / (hi - lo) if hi > lo else 0.0
+        return ((v[candidates] - lo) * scale).astype(np.int64)
+
+    cell = _bin(x) * grid_size + _bin(y)
+    order = np.argsort(cell, kind="stable")
+    sorted_cells = cell[order]
+    starts = np.r_[0, np.flatnonzero(np.diff(sorted_cells)) + 1]
+    group_start = np.repeat(starts, np.diff(np.r_[starts, sorted_cells.size]))
+    rank = np.arange(sorted_cells.size) - group_start
+    mask[candidates[order[rank < max_per_cell]]] = True
+    return mask
+
+
+def volcano_figure(df: pd.DataFrame, x: str, y: pd.Series, significant: str = "Significant",
+                   hover: str = "Gene", title: str = "Volcano Plot") -> go.Figure:
+    """Volcano plot that scales to genome-wide DEG tables.
+
+    Small tables keep the original SVG ``px.scatter``. Larger ones are drawn with
+    ``Scattergl`` and, above ``DECIMATE_THRESHOLD`` genes, the dense non-significant
+    cloud is decimated with :func:`decimate`.
+    """
+    n = len(df)
+    if n <= WEBGL_THRESHOLD:
+        fig = px.scatter(
+            df, x=x, y=y,
+            color=significant,
+            hover_data=[hover],
+            title=title,
+            color_discrete_map=COLORS,
+        )
+        fig.update_layout(template="plotly_dark", height=400)
+        return fig
+
+    xs = df[x].to_numpy(dtype=float)
+    ys = np.asarray(y, dtype=float)
+    sig = df[significant].to_numpy(dtype=bool)
+    shown = decimate(xs, ys, sig) if n > DECIMATE_THRESHOLD else np.ones(n, dtype=bool)
+    labels = df[hover].to_numpy()
+
+    fig = go.Figure()
+    for value in (False, True):
+        idx = np.flatnonzero(shown & (sig == value))
+        total = int(np.count_nonzero(sig == value))
+        name = str(value) if idx.size == total else f"{value} ({idx.size:,} of {total:,} shown)"
+        fig.add_trace(go.Scattergl(
+            x=xs[idx], y=ys[idx],
+            mode="markers",
+            name=name,
+            legendgroup=str(value),
+            marker=dict(color=COLORS[value], size=5),
+            customdata=labels[idx],
+            hovertemplate=f"{hover}=%{{customdata}}<br>{x}=%{{x}}<br>{getattr(y, 'name', 'y')}=%{{y}}<extra></extra>",
+        ))
+    fig.update_layout(
+        template="plotly_dark", height=400, title=title,
+        xaxis_title=x, yaxis_title=getattr(y, "name", None), legend_title_text=significant,
+    )
+    return fig
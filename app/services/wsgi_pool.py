@@ -0,0 +1,124 @@
+# app/services/wsgi_pool.py
+
+import time
+from typing import Optional
+
+import anyio
+from starlette.middleware.wsgi import WSGIMiddleware
+from starlette.responses import JSONResponse
+from starlette.types import Receive, Scope, Send
+
+from app.services.settings import settings
+
+CALLBACK_PATH_SUFFIX = "/_dash-update-component"
+
+
+class WorkerPool:
+    """Sized thread budget plus admission control for one mounted WSGI app.
+
+    A WSGI call first borrows a token from this pool's own ``CapacityLimiter`` and only
+    then enters starlette's unmodified ``WSGIMiddleware``, which runs it on anyio's
+    default thread limiter. FastAPI shares that limiter between every sync endpoint and
+    dependency, so it is grown by ``workers`` tokens when the pool is created. Slow Dash
+    callbacks then hold at most ``workers`` threads and never eat into the API's budget.
+    When ``max_queue`` callback requests are already waiting for a token, new ones are
+    refused with 503 instead of piling up. Page loads and assets are never refused and do
+    not count towards that queue.
+    """
+
+    def __init__(self, workers: int, max_queue: int, retry_after: int = 1):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self._limiter: Optional[anyio.CapacityLimiter] = None
+        self.pending = 0
+        self.pending_callbacks = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.max_queue_depth = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    @property
+    def limiter(self) -> anyio.CapacityLimiter:
+        # Created lazily, inside the server's event loop.
+        if self._limiter is None:
+            anyio.to_thread.current_default_thread_limiter().total_tokens += self.workers
+            self._limiter = anyio.CapacityLimiter(self.workers)
+        return self._limiter
+
+    @property
+    def running(self) -> int:
+        return int(self._limiter.borrowed_tokens) if self._limiter is not None else 0
+
+    @property
+    def queued(self) -> int:
+        return max(self.pending - self.running, 0)
+
+    def admit(self, is_callback: bool) -> bool:
+        # Counted against capacity, not borrowed tokens: requests admitted in the same
+        # event-loop tick have not reached the limiter yet.
+        if is_callback:
+            if self.pending_callbacks >= self.workers + self.max_queue:
+                self.rejected += 1
+                return False
+            self.pending_callbacks += 1
+        self.admitted += 1
+        self.pending += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.pending - self.workers)
+        return True
+
+    def record_wait(self, seconds: float) -> None:
+        self.wait_seconds_total += seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def release(self, is_callback: bool) -> None:
+        if is_callback:
+            self.pending_callbacks -= 1
+        self.pending -= 1
+        self.completed += 1
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "running": self.running,
+            "queued": self.queued,
+            "max_queue_depth": self.max_queue_depth,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "wait_seconds_avg": self.wait_seconds_total / self.completed if self.completed else None,
+            "wait_seconds_max": self.wait_seconds_max,
+        }
+
+
+class PooledWSGIMiddleware:
+    """Drop-in for starlette's ``WSGIMiddleware`` that runs the app on a :class:`WorkerPool`."""
+
+    def __init__(self, app, pool: WorkerPool):
+        self.app = WSGIMiddleware(app)
+        self.pool = pool
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        assert scope["type"] == "http"
+        is_callback = scope["path"].endswith(CALLBACK_PATH_SUFFIX)
+        if not self.pool.admit(is_callback):
+            response = JSONResponse(
+                {"detail": "Dash worker pool is saturated, retry shortly"},
+                status_code=503,
+                headers={"Retry-After": str(self.pool.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            queued_at = time.monotonic()
+            async with self.pool.limiter:
+                self.pool.record_wait(time.monotonic() - queued_at)
+                await self.app(scope, receive, send)
+        finally:
+            self.pool.release(is_callback)
+
+
+dash_pool = WorkerPool(settings.DASH_WORKERS, settings.DASH_MAX_QUEUE)
@@ -0,0 +1,79 @@
+"""Analysis pool inside Dash background callbacks.
+
+Background callbacks run in a process that DiskcacheManager forks per job, where the
+pool started by ``main.lifespan`` is not usable. Runs one job through the app's
+background callback manager with and without ``processes.session()`` and reports which
+processes ran the mapped work: with the session it must fan out to pool workers.
+
+    python -m benchmarks.background_pool
+"""
+
+import os
+import time
+
+import dash
+from dash import Input, Output, dcc, html
+
+from app.dash_app.callbacks_settings import background_callback_manager
+from app.services.concurrency import processes
+
+JOBS = 8
+
+
+def _work(delay: float) -> int:
+    time.sleep(delay)
+    return os.getpid()
+
+
+def _pids(with_session: bool) -> dict:
+    jobs = [(0.2,)] * JOBS
+    start = time.perf_counter()
+    if with_session:
+        with processes.session():
+            workers = processes.map(_work, jobs)
+    else:
+        workers = processes.map(_work, jobs)
+    return {"job": os.getpid(), "workers": sorted(set(workers)), "seconds": time.perf_counter() - start}
+
+
+app = dash.Dash(__name__)
+app.layout = html.Div([dcc.Input(id="mode", value="session"), html.Div(id="out")])
+
+
+@app.callback(
+    Output("out", "children"),
+    Input("mode", "value"),
+    background=True,
+    manager=background_callback_manager,
+)
+def run_job(mode):
+    return _pids(mode == "session")
+
+
+def run(client, mode: str) -> dict:
+    body = {
+        "output": "out.children",
+        "outputs": {"id": "out", "property": "children"},
+        "inputs": [{"id": "mode", "property": "value", "value": mode}],
+        "changedPropIds": ["mode.value"],
+    }
+    job = client.post("/_dash-update-component", json=body).get_json()
+    while True:
+        time.sleep(0.1)
+        response = client.post(
+            f"/_dash-update-component?cacheKey={job['cacheKey']}&job={job['job']}", json=body,
+        ).get_json()
+        if response and "response" in response:
+            return response["response"]["out"]["children"]
+
+
+if __name__ == "__main__":
+    client = app.server.test_client()
+    client.get("/")
+    print(f"pool workers={processes.workers}, {JOBS} jobs of 0.2 s")
+    for mode in ("inline", "session"):
+        result = run(client, mode)
+        fanned_out = result["job"] not in result["workers"]
+        print(f"{mode:>8}: {len(result['workers'])} process(es), {result['seconds']:.2f} s, "
+              f"fanned out={fanned_out}")
+    assert fanned_out, "processes.map ran inline inside processes.session()"
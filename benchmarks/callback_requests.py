@@ -0,0 +1,78 @@
+"""Server callback requests and server-rendered outputs per page load, before any user interaction.
+
+Every callback whose inputs are in the initial layout fires once when the page loads.
+Server callbacks each cost one POST to /_dash-update-component (through FastAPI's
+WSGIMiddleware for the main app); clientside callbacks run in the browser.
+
+The two server columns measure different things. ``server req`` is the number of round
+trips. ``srv outputs`` is the number of components the server renders and serializes in
+those responses. On the analysis pages one multi-output callback already served every
+output, so moving text outputs clientside lowers ``srv outputs`` but leaves ``server req``
+unchanged. Only the main page drops round trips.
+
+    STORAGE_BACKEND=local LOCAL_STORAGE_ROOT=./data python -m benchmarks.callback_requests
+"""
+
+import importlib
+
+import dash
+from dash import html
+
+PAGES = [
+    "app.dash_app.old.projects.deg_analysis",
+    "app.dash_app.old.projects.survival_analysis",
+    "app.dash_app.old.projects.mutation_analysis",
+    "app.dash_app.old.projects.pathway_analysis",
+    "app.dash_app.old.projects.omics_integration_analysis",
+    "app.dash_app.old.projects.drug_sensitivity_prediction_analysis",
+]
+
+
+def _output_ids(dependency: dict) -> list:
+    output = dependency["output"]
+    parts = output.strip(".").split("...") if output.startswith("..") else [output]
+    return [p.rsplit(".", 1)[0] for p in parts]
+
+
+def _layout_ids(layout) -> set:
+    return {getattr(c, "id", None) for c in [layout, *layout._traverse()]} - {None}
+
+
+def _count(dependencies: list, ids: set) -> dict:
+    counts = {"server_requests": 0, "server_outputs": 0, "clientside_callbacks": 0, "clientside_outputs": 0}
+    for dep in dependencies:
+        outputs = _output_ids(dep)
+        if not set(outputs) & ids or dep.get("prevent_initial_call"):
+            continue
+        if dep.get("clientside_function"):
+            counts["clientside_callbacks"] += 1
+            counts["clientside_outputs"] += len(outputs)
+        else:
+            counts["server_requests"] += 1
+            counts["server_outputs"] += len(outputs)
+    return counts
+
+
+def main_app() -> dict:
+    from fastapi.testclient import TestClient
+    from app.main import app, dash_app
+
+    with TestClient(app) as client:
+        dependencies = client.get("/dash/_dash-dependencies").json()
+    return _count(dependencies, _layout_ids(dash_app.layout))
+
+
+def pages() -> dict:
+    modules = [importlib.import_module(name) for name in PAGES]
+    app = dash.Dash(__name__, suppress_callback_exceptions=True)
+    app.layout = html.Div([m.layout for m in modules])
+    dependencies = app.server.test_client().get("/_dash-dependencies").get_json()
+    return {m.__name__.rsplit(".", 1)[-1]: _count(dependencies, _layout_ids(m.layout)) for m in modules}
+
+
+if __name__ == "__main__":
+    rows = {"main (/dash/)": main_app(), **pages()}
+    print(f"{'page':40} {'server req':>10} {'srv outputs':>11} {'clientside':>10} {'cs outputs':>10}")
+    for name, c in rows.items():
+        print(f"{name:40} {c['server_requests']:>10} {c['server_outputs']:>11} "
+              f"{c['clientside_callbacks']:>10} {c['clientside_outputs']:>10}")
@@ -0,0 +1,50 @@
+"""All-pairs co-mutation / exclusivity tests on the bit-packed MutationStore.
+
+Checks the top pairs' Fisher p-values against scipy, then times packing and the
+all-pairs scan on growing random mutation matrices (gene frequencies log-spaced).
+
+    python -m benchmarks.mutation_pairs
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.stats import fisher_exact
+
+from app.services.mutations import MutationStore
+
+CASES = [(500, 1_000), (2_000, 5_000), (20_000, 10_000)]
+MIN_MUTATED = 200
+
+
+def matrix(genes: int, samples: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    freq = np.geomspace(0.001, 0.2, genes)[:, None]
+    return pd.DataFrame((rng.random((genes, samples)) < freq).astype(np.int8))
+
+
+def max_p_error(pairs) -> float:
+    err = 0.0
+    for frame, alternative in ((pairs.cooccurring, "greater"), (pairs.exclusive, "less")):
+        for row in frame.itertuples():
+            table = [[row.both, row.only_a], [row.only_b, row.neither]]
+            p = fisher_exact(table, alternative=alternative).pvalue
+            err = max(err, abs(p - row.p_value) / max(p, 1e-300))
+    return err
+
+
+if __name__ == "__main__":
+    print(f"{'genes':>6} {'samples':>7} {'dense MB':>9} {'packed MB':>9} {'pack s':>7} "
+          f"{'tested':>6} {'pairs':>10} {'scan s':>7}   max rel p error")
+    for genes, samples in CASES:
+        frame = matrix(genes, samples)
+        start = time.perf_counter()
+        store = MutationStore(frame)
+        packed = time.perf_counter() - start
+        start = time.perf_counter()
+        pairs = store.pair_tests(top_k=20, min_mutated=min(MIN_MUTATED, samples // 50))
+        scan = time.perf_counter() - start
+        print(f"{genes:>6} {samples:>7} {frame.memory_usage().sum() / 1e6:>9.1f} {store.bits.nbytes / 1e6:>9.1f} "
+              f"{packed:>7.2f} {pairs.genes_tested:>6} {pairs.pairs_tested:>10,} {scan:>7.1f}   "
+              f"{max_p_error(pairs):.1e}")
@@ -0,0 +1,89 @@
+"""Kaplan-Meier / log-rank: app.services.survival vs lifelines.
+
+Checks that curves, exponential Greenwood bands and the log-rank statistic agree with
+lifelines, then times both for a growing number of groups. lifelines is only needed
+here (``pip install -r benchmarks/requirements.txt``); without it only app.services.survival
+is timed.
+
+    python -m benchmarks.survival_km
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    from lifelines import KaplanMeierFitter
+    from lifelines.statistics import multivariate_logrank_test
+except ImportError:
+    KaplanMeierFitter = multivariate_logrank_test = None
+
+from app.services.survival import kaplan_meier, logrank, survival_table
+
+CASES = [(1_000, 2), (10_000, 2), (10_000, 10), (50_000, 50)]
+
+
+def cohort(n: int, k: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    group = rng.integers(0, k, n)
+    return pd.DataFrame({
+        "time": rng.exponential(10 + group, n).round(1),
+        "event": rng.binomial(1, 0.7, n),
+        "group": [f"g{i}" for i in group],
+    })
+
+
+def with_lifelines(df: pd.DataFrame):
+    curves = {}
+    for name, g in df.groupby("group"):
+        kmf = KaplanMeierFitter().fit(g["time"], g["event"], label=name)
+        curves[name] = (kmf.survival_function_[name], kmf.confidence_interval_)
+    test = multivariate_logrank_test(df["time"], df["group"], df["event"])
+    return curves, test
+
+
+def with_numpy(df: pd.DataFrame):
+    table = survival_table(df["time"], df["event"], df["group"])
+    return kaplan_meier(table), logrank(table)
+
+
+def max_error(df: pd.DataFrame) -> dict:
+    curves, test = with_lifelines(df)
+    km, lr = with_numpy(df)
+    err = {"survival": 0.0, "band": 0.0}
+    for i, name in enumerate(km.groups):
+        sf, ci = curves[name]
+        t = sf.index.to_numpy()[1:]  # lifelines starts its timeline at 0
+        idx = np.searchsorted(km.times, t)
+        err["survival"] = max(err["survival"], np.max(np.abs(km.survival[i, idx] - sf.to_numpy()[1:])))
+        lo, hi = ci.iloc[1:, 0].to_numpy(), ci.iloc[1:, 1].to_numpy()
+        err["band"] = max(err["band"], np.nanmax(np.abs(km.lower[i, idx] - lo)), np.nanmax(np.abs(km.upper[i, idx] - hi)))
+    err["statistic"] = abs(lr.statistic - test.test_statistic)
+    err["p_value"] = abs(lr.p_value - test.p_value)
+    return err
+
+
+def best_of(fn, df, repeat=3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(df)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    if KaplanMeierFitter is None:
+        print("lifelines is not installed: skipping the reference comparison")
+        print(f"{'n':>7} {'groups':>6} {'numpy ms':>9}")
+        for n, k in CASES:
+            print(f"{n:>7} {k:>6} {best_of(with_numpy, cohort(n, k)) * 1000:>9.2f}")
+        raise SystemExit
+    print(f"{'n':>7} {'groups':>6} {'lifelines ms':>13} {'numpy ms':>9} {'speedup':>8}   max abs error")
+    for n, k in CASES:
+        df = cohort(n, k)
+        slow, fast = best_of(with_lifelines, df), best_of(with_numpy, df)
+        err = max_error(df)
+        print(f"{n:>7} {k:>6} {slow * 1000:>13.1f} {fast * 1000:>9.2f} {slow / fast:>7.0f}x   "
+              + ", ".join(f"{k}={v:.1e}" for k, v in err.items()))
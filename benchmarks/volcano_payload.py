@@ -0,0 +1,66 @@
+"""Volcano callback time and figure payload for genome-scale DEG tables.
+
+Compares the original SVG ``px.scatter`` over every gene with
+:func:`app.services.volcano.volcano_figure` (Scattergl + decimation) at 1k, 20k and
+60k genes. Payload is the size of the figure JSON Dash sends to the browser.
+
+    python -m benchmarks.volcano_payload
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from app.services.volcano import volcano_figure
+
+SIZES = [1_000, 20_000, 60_000]
+REPEAT = 3
+
+
+def synthetic_deg(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    log2fc = rng.normal(0, 0.8, n)
+    n_sig = max(n // 20, 1)
+    log2fc[:n_sig] += rng.choice([-1, 1], n_sig) * rng.uniform(1.5, 4, n_sig)
+    z = np.abs(log2fc) / 0.5
+    p = np.clip(np.exp(-z ** 1.5) * rng.uniform(0.2, 1, n), 1e-300, 1)
+    return pd.DataFrame({
+        "Gene": [f"G{i}" for i in range(n)],
+        "log2FC": log2fc,
+        "adj. p-value": p,
+        "Significant": (p < 0.05) & (np.abs(log2fc) > 1),
+    })
+
+
+def baseline(df: pd.DataFrame, y: pd.Series):
+    fig = px.scatter(
+        df, x="log2FC", y=y,
+        color="Significant",
+        hover_data=["Gene"],
+        title="Volcano Plot",
+        color_discrete_map={True: "crimson", False: "gray"},
+    )
+    fig.update_layout(template="plotly_dark", height=400)
+    return fig
+
+
+def measure(build, df, y):
+    best, payload = float("inf"), None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        payload = build(df, y).to_json()  # what the Dash callback serializes
+        best = min(best, time.perf_counter() - start)
+    return best, len(payload)
+
+
+if __name__ == "__main__":
+    print(f"{'genes':>7} {'variant':>10} {'time ms':>9} {'payload KB':>11} {'points':>8}")
+    for n in SIZES:
+        df = synthetic_deg(n)
+        y = -np.log10(df["adj. p-value"])
+        for name, build in (("svg", baseline), ("gl+decim", lambda d, v: volcano_figure(d, "log2FC", v))):
+            seconds, size = measure(build, df, y)
+            points = sum(len(t.x) for t in build(df, y).data)
+            print(f"{n:>7} {name:>10} {seconds * 1000:>9.1f} {size / 1024:>11.1f} {points:>8}")